@@ -14,12 +14,17 @@ Assumptions:
 
 import os
 import io
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date as DateType
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 import streamlit as st
-from supabase import create_client
+from supabase import PostgrestAPIError, create_client
 from dotenv import load_dotenv
+from dashboard_common import as_float32, for_export, install_orjson_response, rows_all_in_range, xlsx_bytes
 
 
 # Map location IDs → friendly names for column display
@@ -38,37 +43,252 @@ LOCATION_ID_TO_NAME = {
     "16004": "BLK 206A Punggol Place",
     "16005": "Woodlands 11",
 }
+# Precomputed once: pandas ignores rename keys that aren't present
+_RENAME = dict(LOCATION_ID_TO_NAME)
+_ID_SET = frozenset(LOCATION_ID_TO_NAME)
+_META_COLS = frozenset(("Date", "Time"))
+ALL_LOCATION_IDS = tuple(LOCATION_ID_TO_NAME)
+_ID_NAME_GET = LOCATION_ID_TO_NAME.get
+
+ABOUT_MD = """
+**Noise Monitoring System**
+
+This dashboard displays noise level readings (in decibels) collected every minute from monitoring stations across Singapore.
+
+**Data Structure:**
+- Readings are collected every minute
+- Data is organized by date, time, and location
+- Values represent noise levels in dB
+
+**Features:**
+- Filter by date range and locations
+- Filter by noise level range
+- Export data as CSV or Excel
+- Pagination for large datasets
+"""
+
+
+@st.cache_resource(show_spinner=False)
+def _load_env() -> None:
+    """Read .env once per process; this script itself re-executes on every rerun."""
+    load_dotenv()
+
+
+_load_env()
 
 DEFAULT_VIEW = os.getenv("SUPABASE_WIDE_VIEW", "wide_view_mv")
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
 PAGE_SIZE = 200
+# Seconds a fetched page stays cached; also how long a prefetch counts as done
+PAGE_CACHE_TTL = 300
+# "Fetch all" slices: PostgREST's default max-rows, kept low-concurrency for rate limits
+FETCH_ALL_BATCH = 1000
+FETCH_ALL_WORKERS = 8
+# PostgREST's "function not found in the schema cache" error code
+MISSING_FUNCTION_CODE = "PGRST202"
+
+@st.cache_resource(show_spinner=False)
+def get_client():
+    """Create the Supabase client once per process and reuse it across reruns."""
+    if not SUPABASE_URL or not SUPABASE_ANON_KEY:
+        raise RuntimeError("SUPABASE_URL or SUPABASE_ANON_KEY not set.")
+    install_orjson_response()
+    return create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+
+
+@st.cache_resource(show_spinner=False)
+def _exec_sql_state() -> dict:
+    """Per-process memo of whether the exec_sql RPC exists, so page fetches on a
+    database without it skip straight to the plain select."""
+    return {"available": True}
+
+
+def _frame_schema(ids):
+    """Date/Time stay strings, readings go straight to float32; None means infer."""
+    if ids is None:
+        return None
+    return pa.schema(
+        [("Date", pa.string()), ("Time", pa.string()), *((lid, pa.float32()) for lid in ids)]
+    )
 
 
-def get_client():
-    load_dotenv()
-    url = os.environ["SUPABASE_URL"]
-    key = os.environ["SUPABASE_ANON_KEY"]
-    return create_client(url, key)
+def _to_frame(rows, ids=None) -> pd.DataFrame:
+    """Build an Arrow-backed frame from the JSON rows instead of boxed objects.
+
+    With the selected ids known the schema is given up front, so Arrow skips type
+    inference and the readings never pass through double or null-typed columns.
+    """
+    schema = _frame_schema(ids) if rows else None
+    try:
+        return pa.Table.from_pylist(rows or [], schema=schema).to_pandas(types_mapper=pd.ArrowDtype)
+    except pa.ArrowInvalid:
+        # A column mixing numbers and strings has no single Arrow type
+        return pd.DataFrame(rows)
+
 
+def _select_list(ids) -> str:
+    return "*" if ids is None else ",".join(["Date", "Time", *ids])
 
-def fetch_page(page: int, page_size: int) -> pd.DataFrame:
+
+def _apply_filters(query, start_iso, end_iso, ids=None, vmin=None, vmax=None):
+    """Push the date range and the value range into the PostgREST query.
+
+    filter_frame keeps rows where every selected column is null or in range:
+    one or= param per column, which PostgREST ANDs together.
+    """
+    if start_iso:
+        query = query.gte("Date", start_iso)
+    if end_iso:
+        query = query.lte("Date", end_iso)
+    if ids and (vmin is not None or vmax is not None):
+        for lid in ids:
+            bounds = []
+            if vmin is not None:
+                bounds.append(f"{lid}.gte.{vmin}")
+            if vmax is not None:
+                bounds.append(f"{lid}.lte.{vmax}")
+            in_range = bounds[0] if len(bounds) == 1 else f"and({','.join(bounds)})"
+            query = query.or_(f"{lid}.is.null,{in_range}")
+    return query
+
+
+def _where_sql(start_iso, end_iso, ids=None, vmin=None, vmax=None) -> str:
+    """Same predicates as _apply_filters, for the exec_sql RPC path."""
+    where = []
+    if start_iso:
+        where.append(f"\"Date\" >= '{start_iso}'")
+    if end_iso:
+        where.append(f"\"Date\" <= '{end_iso}'")
+    if ids and (vmin is not None or vmax is not None):
+        for lid in ids:
+            col = f'"{lid}"'
+            bounds = []
+            if vmin is not None:
+                bounds.append(f"{col} >= {float(vmin)}")
+            if vmax is not None:
+                bounds.append(f"{col} <= {float(vmax)}")
+            where.append(f"({col} IS NULL OR ({' AND '.join(bounds)}))")
+    return f" WHERE {' AND '.join(where)}" if where else ""
+
+
+def _query_key(start_date, end_date, location_ids):
+    """Normalize widget values into hashable cache-key primitives."""
+    start_iso = start_date.isoformat() if start_date else None
+    end_iso = end_date.isoformat() if end_date else None
+    if location_ids is None:
+        return start_iso, end_iso, None
+    selected = set(location_ids)
+    # Keep the view's column order so the table layout doesn't follow click order
+    ids = tuple(lid for lid in LOCATION_ID_TO_NAME if lid in selected)
+    return start_iso, end_iso, ids
+
+
+@st.cache_data(ttl=PAGE_CACHE_TTL, show_spinner=False, max_entries=64)
+def _fetch_page_cached(page: int, page_size: int, start_iso, end_iso, ids, vmin, vmax) -> pd.DataFrame:
+    """Fetch one page of the wide view; cached on hashable primitives only."""
     supabase = get_client()
     offset = page * page_size
-    # Try RPC for raw SQL first; fallback to simple select
-    try:
-        resp = supabase.postgrest.rpc(
-            "exec_sql",
-            {
-                "sql": f"SELECT * FROM public.{DEFAULT_VIEW} ORDER BY \"Date\", \"Time\" OFFSET {offset} LIMIT {page_size}"
-            },
-        ).execute()
-        rows = resp.data or []
-        return pd.DataFrame(rows)
-    except Exception:
-        resp = supabase.table(DEFAULT_VIEW).select("*").execute()
-        df = pd.DataFrame(resp.data or [])
-        if df.empty:
-            return df
-        return df.sort_values(["Date", "Time"]).iloc[offset: offset + page_size]
+
+    if ids is None:
+        cols_sql = "*"
+    else:
+        cols_sql = ", ".join(f'"{c}"' for c in ("Date", "Time", *ids))
+    where_sql = _where_sql(start_iso, end_iso, ids, vmin, vmax)
+
+    # Try RPC for raw SQL first (unless it's known to be missing); fallback to simple select
+    exec_sql = _exec_sql_state()
+    if exec_sql["available"]:
+        try:
+            resp = supabase.postgrest.rpc(
+                "exec_sql",
+                {
+                    "sql": f"SELECT {cols_sql} FROM public.{DEFAULT_VIEW}{where_sql} ORDER BY \"Date\", \"Time\" OFFSET {offset} LIMIT {page_size}"
+                },
+            ).execute()
+            return _to_frame(resp.data, ids)
+        except PostgrestAPIError as e:
+            # Only a missing function is remembered; other errors retry the RPC next time
+            if e.code == MISSING_FUNCTION_CODE:
+                exec_sql["available"] = False
+        except Exception:
+            pass
+
+    # Ordered and ranged server-side: only this page's rows and columns are sent
+    return _fetch_range(offset, page_size, start_iso, end_iso, ids, vmin, vmax)
+
+
+def fetch_page(page: int, page_size: int, start_date=None, end_date=None,
+               location_ids=None, vmin=None, vmax=None) -> pd.DataFrame:
+    start_iso, end_iso, ids = _query_key(start_date, end_date, location_ids)
+    return _fetch_page_cached(page, page_size, start_iso, end_iso, ids, vmin, vmax)
+
+
+@st.cache_resource
+def _prefetch_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=2)
+
+
+def prefetch_page(page: int, page_size: int, start_date=None, end_date=None,
+                  location_ids=None, vmin=None, vmax=None) -> None:
+    """Warm the page cache in the background so the next page click is instant."""
+    key = (page, page_size, *_query_key(start_date, end_date, location_ids), vmin, vmax)
+    # key -> submit time; entries older than the cache TTL are dropped, so the
+    # page is warmed again once its cached copy has expired
+    now = time.monotonic()
+    submitted = st.session_state.setdefault("prefetched_pages", {})
+    for old in [k for k, t in submitted.items() if now - t > PAGE_CACHE_TTL]:
+        del submitted[old]
+    if key in submitted:
+        return
+    submitted[key] = now
+    _prefetch_executor().submit(
+        fetch_page, page, page_size, start_date, end_date, location_ids, vmin, vmax
+    )
+
+
+def _range_query(offset: int, limit: int, start_iso, end_iso, ids, vmin, vmax, count=None):
+    query = get_client().table(DEFAULT_VIEW).select(_select_list(ids), count=count)
+    query = _apply_filters(query, start_iso, end_iso, ids, vmin, vmax)
+    return query.order("Date").order("Time").range(offset, offset + limit - 1).execute()
+
+
+def _fetch_range(offset: int, limit: int, start_iso, end_iso, ids, vmin, vmax) -> pd.DataFrame:
+    return _to_frame(_range_query(offset, limit, start_iso, end_iso, ids, vmin, vmax).data, ids)
+
+
+@st.cache_data(ttl=60, show_spinner=False, max_entries=64)
+def _fetch_total_count_cached(start_iso, end_iso, ids, vmin, vmax) -> int:
+    """Row count via a HEAD request with count=exact: no rows are transferred."""
+    head = get_client().table(DEFAULT_VIEW).select("Date", count="exact", head=True)
+    return _apply_filters(head, start_iso, end_iso, ids, vmin, vmax).execute().count or 0
+
+
+def fetch_total_count(start_date=None, end_date=None, location_ids=None, vmin=None, vmax=None) -> int:
+    start_iso, end_iso, ids = _query_key(start_date, end_date, location_ids)
+    return _fetch_total_count_cached(start_iso, end_iso, ids, vmin, vmax)
+
+
+@st.cache_data(ttl=300, show_spinner=False, max_entries=8)
+def _fetch_all_cached(start_iso, end_iso, ids, vmin, vmax) -> pd.DataFrame:
+    """Pull the first slice along with an exact count, then the rest concurrently."""
+    first = _range_query(0, FETCH_ALL_BATCH, start_iso, end_iso, ids, vmin, vmax, count="exact")
+    total = first.count or 0
+    if not total:
+        return pd.DataFrame()
+
+    offsets = range(FETCH_ALL_BATCH, total, FETCH_ALL_BATCH)
+    with ThreadPoolExecutor(max_workers=FETCH_ALL_WORKERS) as pool:
+        rest = list(pool.map(
+            lambda off: _fetch_range(off, FETCH_ALL_BATCH, start_iso, end_iso, ids, vmin, vmax),
+            offsets,
+        ))
+    return pd.concat([_to_frame(first.data, ids), *rest], ignore_index=True)
+
+
+def fetch_all_rows(start_date=None, end_date=None, location_ids=None, vmin=None, vmax=None) -> pd.DataFrame:
+    start_iso, end_iso, ids = _query_key(start_date, end_date, location_ids)
+    return _fetch_all_cached(start_iso, end_iso, ids, vmin, vmax)
 
 
 def filter_frame(
@@ -82,13 +302,6 @@ def filter_frame(
     if df.empty:
         return df
 
-    df = df.copy()
-
-    # Ensure Date is date type (strip time if present)
-    if "Date" in df.columns:
-        df["Date"] = pd.to_datetime(df["Date"]).dt.date
-
-    # --- Date filter ---
     start_date = end_date = None
 
     # date_input_value can be:
@@ -102,33 +315,66 @@ def filter_frame(
     elif isinstance(date_input_value, DateType):
         start_date = end_date = date_input_value
 
-    if start_date is not None and end_date is not None:
-        df = df[(df["Date"] >= start_date) & (df["Date"] <= end_date)]
+    # Unrelated widget reruns hit the cache instead of re-filtering the same frame
+    return _filter_frame_cached(df, start_date, end_date, tuple(location_ids), vmin, vmax)
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _filter_frame_cached(df: pd.DataFrame, start_date, end_date, location_ids: tuple, vmin, vmax) -> pd.DataFrame:
+    """filter_frame body, keyed on the frame's hash plus the normalized filters."""
+    # Keep Date as datetime64 (midnight if a time was present) for vectorized compares
+    dates = pd.to_datetime(df["Date"], format="ISO8601", cache=True).dt.normalize()
+    has_date_range = start_date is not None and end_date is not None
+    has_value_range = vmin is not None or vmax is not None
 
     # --- Location columns filter ---
-    id_cols = [c for c in df.columns if c not in ("Date", "Time")]
-    keep_ids = [lid for lid in id_cols if lid in location_ids]
+    id_cols = [c for c in df.columns if c not in _META_COLS]
+    selected = _ID_SET.intersection(location_ids)
+    keep_ids = [lid for lid in id_cols if lid in selected]
 
-    if keep_ids:
-        df = df[["Date", "Time"] + keep_ids]
-    else:
-        df = df[["Date", "Time"]]
+    # Convert selected columns to float32 (Supabase sends JSON doubles, sometimes strings).
+    # Always, not just for value filters: the cached frame, stats and table payload all
+    # carry half the bytes, and two-decimal dB readings never need doubles.
+    values = as_float32(df[keep_ids])
+
+    # Nothing to filter: skip the row mask and the row/column selection
+    if not has_date_range and not has_value_range and len(keep_ids) == len(id_cols):
+        return df.assign(Date=dates, **values).rename(columns=_RENAME)
+
+    # Build one row mask for every filter, then index the frame once
+    mask = np.ones(len(df), dtype=bool)
 
-    # Convert selected columns to numeric (Supabase might send strings)
-    for col in keep_ids:
-        df.loc[:, col] = pd.to_numeric(df[col], errors="coerce")
+    if has_date_range:
+        mask &= ((dates >= pd.Timestamp(start_date)) & (dates <= pd.Timestamp(end_date))).to_numpy()
 
     # --- Numeric range filter across selected columns ---
-    if keep_ids and (vmin is not None or vmax is not None):
-        for col in keep_ids:
-            if vmin is not None:
-                df = df[(df[col].isna()) | (df[col] >= vmin)]
-            if vmax is not None:
-                df = df[(df[col].isna()) | (df[col] <= vmax)]
+    # Bounds are rounded to float32 like the readings, so a reading the database
+    # matched exactly at the bound (70.1 stored as 70.0999985) isn't dropped here
+    lo = -np.inf if vmin is None else float(np.float32(vmin))
+    hi = np.inf if vmax is None else float(np.float32(vmax))
+    if keep_ids and has_value_range:
+        mask &= rows_all_in_range(values.to_numpy(dtype=np.float32, na_value=np.nan), lo, hi)
+
+    # Assign the already-filtered dates/values: full-length Series would re-expand
+    # an empty selection back to every row
+    df = df.loc[mask, ["Date", "Time"] + keep_ids].assign(Date=dates[mask], **values[mask])
 
     # Rename to friendly names
-    rename = {lid: LOCATION_ID_TO_NAME.get(lid, lid) for lid in keep_ids}
-    return df.rename(columns=rename)
+    return df.rename(columns=_RENAME)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def to_csv_bytes(df: pd.DataFrame) -> bytes:
+    """Serialize once per distinct frame; repeat reruns reuse the cached bytes."""
+    buf = io.BytesIO()
+    for_export(df).to_csv(buf, index=False)
+    return buf.getvalue()
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def to_xlsx_bytes(df: pd.DataFrame) -> bytes:
+    """Serialize once per distinct frame; repeat reruns reuse the cached bytes."""
+    return xlsx_bytes(df)
 
 
 
@@ -166,22 +412,7 @@ def main():
     
     # Info section in sidebar
     with st.sidebar.expander("ℹ️ About", expanded=False):
-        st.markdown("""
-        **Noise Monitoring System**
-        
-        This dashboard displays noise level readings (in decibels) collected every minute from monitoring stations across Singapore.
-        
-        **Data Structure:**
-        - Readings are collected every minute
-        - Data is organized by date, time, and location
-        - Values represent noise levels in dB
-        
-        **Features:**
-        - Filter by date range and locations
-        - Filter by noise level range
-        - Export data as CSV or Excel
-        - Pagination for large datasets
-        """)
+        st.markdown(ABOUT_MD)
 
     st.sidebar.header("🔍 Filters")
     st.sidebar.markdown("---")
@@ -210,12 +441,11 @@ def main():
     
     st.sidebar.markdown("---")
     
-    all_ids = list(LOCATION_ID_TO_NAME.keys())
     selected_ids = st.sidebar.multiselect(
         "📍 Locations",
-        options=all_ids,
-        default=all_ids,
-        format_func=lambda x: LOCATION_ID_TO_NAME.get(x, x),
+        options=ALL_LOCATION_IDS,
+        default=ALL_LOCATION_IDS,
+        format_func=_ID_NAME_GET,
         help="Select one or more monitoring locations"
     )
     
@@ -245,68 +475,85 @@ def main():
         step=1,
         help=f"Navigate through pages (each page shows {PAGE_SIZE} rows)"
     )
-    
+    fetch_all = st.sidebar.checkbox(
+        "📦 Fetch all matching rows",
+        value=False,
+        help="Load every row in the date range at once instead of one page"
+    )
+
     if st.sidebar.button("🔄 Refresh Data", use_container_width=True):
+        _fetch_page_cached.clear()
+        _fetch_all_cached.clear()
+        _fetch_total_count_cached.clear()
+        _exec_sql_state.clear()
+        st.session_state.pop("prefetched_pages", None)
         st.rerun()
 
     try:
         with st.spinner("Loading data from database..."):
-            df = fetch_page(page, PAGE_SIZE)
+            if fetch_all:
+                df = fetch_all_rows(start_date, end_date, selected_ids, vmin, vmax)
+            else:
+                df = fetch_page(page, PAGE_SIZE, start_date, end_date, selected_ids, vmin, vmax)
             filtered = filter_frame(df, date_range, selected_ids, vmin, vmax)
+            if fetch_all:
+                # Every matching row is already loaded, so the count is just its length
+                total_in_range = len(df)
+            elif df.empty and page == 0:
+                # Same predicates as the count: nothing on the first page means nothing at all
+                total_in_range = 0
+            else:
+                total_in_range = fetch_total_count(start_date, end_date, selected_ids, vmin, vmax)
+
+        # Warm the next page only if the range actually extends past this one
+        if not fetch_all and (page + 1) * PAGE_SIZE < total_in_range:
+            prefetch_page(page + 1, PAGE_SIZE, start_date, end_date, selected_ids, vmin, vmax)
 
         if not filtered.empty:
             # Display summary statistics
             st.markdown("### 📊 Summary Statistics")
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                st.metric("Total Records", len(filtered))
-            
+            col0, col1, col2, col3, col4 = st.columns(5)
+
             # Calculate statistics for numeric columns (location columns)
-            numeric_cols = [c for c in filtered.columns if c not in ("Date", "Time")]
-            if numeric_cols:
-                all_values = []
-                for col in numeric_cols:
-                    all_values.extend(filtered[col].dropna().tolist())
-                
-                if all_values:
-                    with col2:
-                        st.metric("Average Reading", f"{sum(all_values)/len(all_values):.2f} dB")
-                    with col3:
-                        st.metric("Min Reading", f"{min(all_values):.2f} dB")
-                    with col4:
-                        st.metric("Max Reading", f"{max(all_values):.2f} dB")
+            numeric_cols = [c for c in filtered.columns if c not in _META_COLS]
+            # float32 like the columns themselves: no widened copy of the block
+            mat = filtered[numeric_cols].to_numpy(dtype=np.float32, na_value=np.nan)
+            present = mat[~np.isnan(mat)]
+
+            with col0:
+                st.metric("Total Records in range", total_in_range)
+            with col1:
+                st.metric("Records loaded" if fetch_all else "Records on this page", mat.shape[0])
+
+            if present.size:
+                with col2:
+                    st.metric("Average Reading", f"{present.mean(dtype=np.float64):.2f} dB")
+                with col3:
+                    st.metric("Min Reading", f"{present.min():.2f} dB")
+                with col4:
+                    st.metric("Max Reading", f"{present.max():.2f} dB")
             
             st.divider()
             
             # Display the data table with enhanced formatting
             st.markdown("### 📋 Data Table")
-            st.caption(f"Showing {len(filtered)} rows (page {page + 1}, page size {PAGE_SIZE}). Use filters in the sidebar to refine results.")
-            
-            # Format the dataframe for better display
-            display_df = filtered.copy()
-            if "Date" in display_df.columns:
-                display_df["Date"] = pd.to_datetime(display_df["Date"]).dt.strftime("%Y-%m-%d")
-            if "Time" in display_df.columns:
-                display_df["Time"] = display_df["Time"].astype(str)
-            
-            # Format numeric columns for better display
-            format_dict = {col: "{:.2f}" for col in numeric_cols if col in display_df.columns}
-            if format_dict:
-                styled_df = display_df.style.format(format_dict, na_rep="N/A")
-                st.dataframe(
-                    styled_df,
-                    use_container_width=True,
-                    height=600,
-                    hide_index=True
-                )
+            if fetch_all:
+                st.caption(f"Showing all {len(filtered)} matching rows. Use filters in the sidebar to refine results.")
             else:
-                st.dataframe(
-                    display_df,
-                    use_container_width=True,
-                    height=600,
-                    hide_index=True
-                )
+                st.caption(f"Showing {len(filtered)} rows (page {page + 1}, page size {PAGE_SIZE}). Use filters in the sidebar to refine results.")
+            
+            # Formatting happens in the frontend: no display copy, and the payload stays numeric
+            column_config = {"Date": st.column_config.DateColumn("Date", format="YYYY-MM-DD")}
+            column_config.update(
+                {col: st.column_config.NumberColumn(col, format="%.2f") for col in numeric_cols}
+            )
+            st.dataframe(
+                filtered,
+                column_config=column_config,
+                use_container_width=True,
+                height=600,
+                hide_index=True
+            )
             
             # Enhanced download functionality
             st.divider()
@@ -316,14 +563,16 @@ def main():
             
             with col_dl1:
                 # Download current filtered view as CSV
-                csv = filtered.to_csv(index=False)
                 timestamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
                 filename = f"noise_readings_{timestamp}.csv"
                 st.download_button(
                     label="📥 Download Current View (CSV)",
-                    data=csv,
+                    # Serialized on click only; to_csv_bytes' cache makes re-clicks free
+                    data=lambda: to_csv_bytes(filtered),
                     file_name=filename,
                     mime="text/csv",
+                    # Download only; a click doesn't rerun (and re-query) the whole page
+                    on_click="ignore",
                     use_container_width=True,
                     help="Download the currently filtered and displayed data"
                 )
@@ -331,15 +580,12 @@ def main():
             with col_dl2:
                 # Download as Excel
                 try:
-                    import io
-                    excel_buffer = io.BytesIO()
-                    filtered.to_excel(excel_buffer, index=False, engine='openpyxl')
-                    excel_buffer.seek(0)
                     st.download_button(
                         label="📊 Download as Excel",
-                        data=excel_buffer,
+                        data=lambda: to_xlsx_bytes(filtered),
                         file_name=f"noise_readings_{timestamp}.xlsx",
                         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                        on_click="ignore",
                         use_container_width=True,
                         help="Download data in Excel format (.xlsx)"
                     )
@@ -0,0 +1,183 @@
+"""
+dashboard_common.py
+-------------------
+Helpers shared by the two Streamlit dashboards (app.py and streamlit_app.py),
+so a fix to one of them lands in both.
+
+What this file contains:
+  - `install_orjson_response()`: swaps postgrest's response parser for an orjson
+    one, but only on the postgrest release it was written against.
+  - `as_float32(...)` / `for_export(...)`: the float32 reading columns both apps
+    filter on, and their 2-decimal file-friendly form.
+  - `xlsx_bytes(...)`: the Excel export, streamed in row blocks.
+  - `rows_all_in_range(...)`, `rows_any_in_range(...)`, `out_of_range(...)`:
+    the value-range masks, run as numba kernels on large frames when numba is
+    installed and as numpy passes otherwise.
+"""
+
+import io
+from importlib.metadata import PackageNotFoundError, version
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import xlsxwriter
+from postgrest import APIResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+
+# _orjson_response leans on APIResponse internals; requirements.txt pins postgrest
+# to this release line and any other one keeps the stock parser.
+POSTGREST_SERIES = (2, 32)
+# dB readings don't need double precision; halves the numeric block
+FLOAT32 = pd.ArrowDtype(pa.float32())
+# Excel export is written in row blocks so "Fetch all" frames don't spike memory
+XLSX_CHUNK_ROWS = 10_000
+# Below this the JIT call overhead outweighs the numpy passes
+NUMBA_MIN_ROWS = 5000
+
+
+def postgrest_series() -> tuple:
+    """(major, minor) of the installed postgrest, or () when it cannot be read."""
+    try:
+        return tuple(int(part) for part in version("postgrest").split(".")[:2])
+    except (PackageNotFoundError, ValueError):
+        return ()
+
+
+def _orjson_response(request_response) -> APIResponse:
+    """postgrest's stock parser runs pydantic validate_json over every row; orjson
+    decodes the same 1000-row page about 10x faster."""
+    count = APIResponse._get_count_from_http_request_response(request_response)
+    try:
+        data = orjson.loads(request_response.content)
+    except orjson.JSONDecodeError:
+        # CSV and count-only (HEAD) bodies, handled like the stock parser
+        data = request_response.text or []
+    return APIResponse.model_construct(data=data, count=count)
+
+
+def install_orjson_response() -> bool:
+    """Route postgrest response parsing through orjson. Returns False, leaving the
+    stock parser in place, without orjson or on an untested postgrest."""
+    if orjson is None or postgrest_series() != POSTGREST_SERIES:
+        return False
+    if not hasattr(APIResponse, "_get_count_from_http_request_response"):
+        return False
+    APIResponse.from_http_request_response = staticmethod(_orjson_response)
+    return True
+
+
+def as_float32(block: pd.DataFrame) -> pd.DataFrame:
+    """Cast all location columns in one go; no-op when they already are float32.
+
+    dB readings carry two decimals, so float32 is plenty and halves the bytes
+    every later pass (and st.dataframe's Arrow payload) has to move.
+    """
+    if all(dt == FLOAT32 for dt in block.dtypes):
+        return block
+    try:
+        return block.astype(FLOAT32)
+    except (TypeError, ValueError):
+        # Stray non-numeric strings: fall back to coercing them to NA
+        return block.apply(pd.to_numeric, errors="coerce").astype(FLOAT32)
+
+
+def for_export(df: pd.DataFrame) -> pd.DataFrame:
+    """File-friendly copy: 2-decimal doubles (not float32 noise like 45.29999923706055) and plain dates."""
+    readings = [c for c, dt in df.dtypes.items() if dt == FLOAT32]
+    if readings:
+        df = df.astype({c: "float64[pyarrow]" for c in readings}).round({c: 2 for c in readings})
+    if "Date" in df.columns and pd.api.types.is_datetime64_any_dtype(df["Date"]):
+        # Plain dates in the files, not midnight datetimes
+        df = df.assign(Date=df["Date"].dt.date)
+    return df
+
+
+def xlsx_bytes(df: pd.DataFrame) -> bytes:
+    """Excel bytes streamed through xlsxwriter's constant_memory mode, one block at a time."""
+    df = for_export(df)
+    buf = io.BytesIO()
+    # Row by row: df.to_excel emits cells column by column, which constant_memory drops
+    workbook = xlsxwriter.Workbook(buf, {"constant_memory": True, "default_date_format": "yyyy-mm-dd"})
+    sheet = workbook.add_worksheet()
+    sheet.write_row(0, 0, list(df.columns))
+    for start in range(0, len(df), XLSX_CHUNK_ROWS):
+        block = df.iloc[start:start + XLSX_CHUNK_ROWS].astype(object)
+        rows = block.where(block.notna(), None).to_numpy().tolist()
+        for offset, row in enumerate(rows, start=start + 1):
+            sheet.write_row(offset, 0, row)
+    workbook.close()
+    return buf.getvalue()
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _rows_all_in_range_jit(vals, vmin, vmax):
+        n, k = vals.shape
+        out = np.empty(n, np.bool_)
+        for i in prange(n):
+            ok = True
+            for j in range(k):
+                x = vals[i, j]
+                if x == x and (x < vmin or x > vmax):
+                    ok = False
+                    break
+            out[i] = ok
+        return out
+
+    @njit(parallel=True, cache=True)
+    def _rows_any_in_range_jit(vals, vmin, vmax):
+        n, k = vals.shape
+        out = np.zeros(n, np.bool_)
+        for i in prange(n):
+            for j in range(k):
+                x = vals[i, j]
+                if x == x and x >= vmin and x <= vmax:
+                    out[i] = True
+                    break
+        return out
+
+    @njit(parallel=True, cache=True)
+    def _out_of_range_jit(vals, vmin, vmax):
+        n, k = vals.shape
+        out = np.zeros((n, k), np.bool_)
+        for i in prange(n):
+            for j in range(k):
+                x = vals[i, j]
+                out[i, j] = x < vmin or x > vmax
+        return out
+
+
+def _use_jit(vals: np.ndarray) -> bool:
+    return njit is not None and len(vals) > NUMBA_MIN_ROWS
+
+
+def rows_all_in_range(vals: np.ndarray, vmin: float, vmax: float) -> np.ndarray:
+    """Rows of a (rows x locations) float32 block whose non-NaN readings all lie in [vmin, vmax]."""
+    if _use_jit(vals):
+        return _rows_all_in_range_jit(vals, vmin, vmax)
+    return ~out_of_range(vals, vmin, vmax).any(axis=1)
+
+
+def rows_any_in_range(vals: np.ndarray, vmin: float, vmax: float) -> np.ndarray:
+    """Rows with at least one reading in [vmin, vmax]; NaN never counts."""
+    if _use_jit(vals):
+        return _rows_any_in_range_jit(vals, vmin, vmax)
+    return ((vals >= vmin) & (vals <= vmax)).any(axis=1)
+
+
+def out_of_range(vals: np.ndarray, vmin: float, vmax: float) -> np.ndarray:
+    """Cells outside [vmin, vmax]; NaN cells compare False and stay as they are."""
+    if _use_jit(vals):
+        return _out_of_range_jit(vals, vmin, vmax)
+    return (vals < vmin) | (vals > vmax)
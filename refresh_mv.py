@@ -53,6 +53,17 @@ def main():
             log.error("Manual intervention required: run REFRESH MATERIALIZED VIEW public.wide_view_mv; in SQL Editor")
             raise SystemExit(1)
 
+    # The health panel's per-day rollup is built from wide_view_mv, so refresh it second.
+    # Optional: the app falls back to counting minute rows when it's missing.
+    try:
+        supabase.rpc(
+            "exec_sql",
+            {"query": "REFRESH MATERIALIZED VIEW public.daily_counts_mv;"}
+        ).execute()
+        log.info("✅ daily_counts_mv refreshed")
+    except Exception as e:
+        log.warning(f"daily_counts_mv refresh skipped: {e}")
+
     # Verify the MV is current
     try:
         result = supabase.table("wide_view_mv") \
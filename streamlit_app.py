@@ -10,12 +10,21 @@ Enhanced with:
 
 import os
 import io
-from datetime import date, datetime, timedelta
+import csv
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 import streamlit as st
-from supabase import create_client
+from supabase import ClientOptions, create_client
 from dotenv import load_dotenv
+from dashboard_common import (
+    as_float32, for_export, install_orjson_response, out_of_range, rows_any_in_range, xlsx_bytes,
+)
 from yearly_analysis_tab import show_yearly_analysis_tab
 from location_presets import LOCATION_PRESETS
 
@@ -35,26 +44,59 @@ LOCATION_ID_TO_NAME = {
     "16004": "BLK 206A Punggol Place",
     "16005": "Woodlands 11",
 }
+# Non-reading columns of the wide layout
+META_COLS = frozenset(("Date", "Time"))
+
+
+def ordered_ids(location_ids) -> tuple:
+    """Selected ids in the view's column order, so click order can't miss a cache.
+
+    The membership set is built once here; `lid in set(...)` inside the
+    generator would rebuild it for every one of the 13 ids.
+    """
+    selected = set(location_ids or ())
+    return tuple(lid for lid in LOCATION_ID_TO_NAME if lid in selected)
 
 DEFAULT_VIEW = os.getenv("SUPABASE_WIDE_VIEW", "wide_view_mv")
+# Per-day COUNT() of each location column, rolled up from DEFAULT_VIEW
+DAILY_COUNTS_VIEW = os.getenv("SUPABASE_DAILY_COUNTS_VIEW", "daily_counts_mv")
+# Long-format source table: one row per (location_id, reading_datetime)
+READINGS_TABLE = os.getenv("SUPABASE_TABLE", "meter_readings")
+# Old meter IDs still present in READINGS_TABLE, folded into their current column
+LOCATION_ID_ALIASES = {"16026": "16367"}
+# The reverse, for DEFAULT_VIEW: it still names those columns by the old id
+WIDE_COLUMN_FOR_ID = {new: old for old, new in LOCATION_ID_ALIASES.items()}
+# One row per location: its newest reading (DISTINCT ON over meter_readings)
+LATEST_VIEW = os.getenv("SUPABASE_LATEST_VIEW", "latest_readings_v")
+# Concurrent per-day fetches; kept modest for Supabase rate limits
+FETCH_WORKERS = 8
+# Excel's sheet limit, header row included
+XLSX_MAX_ROWS = 1_048_576
+# Rows sent to the browser per table page; the full set is still in the exports
+TABLE_PAGE_SIZE = 1000
 READINGS_PER_DAY = 1440  # 60 min/hour * 24 hours
+# "HH:MM:00" for every minute of the day, indexed by minute-of-day instead of strftime per row
+MINUTE_LABELS = np.array([f"{m // 60:02d}:{m % 60:02d}:00" for m in range(READINGS_PER_DAY)], dtype=object)
 # Adjusted thresholds for real-world data with gaps
 OFFLINE_THRESHOLD = 0.30  # < 30% data = offline (was 10%)
 DEGRADED_THRESHOLD = 0.70  # < 70% data = degraded (was 90%)
 # For overall status across date range
 ONLINE_OVERALL_THRESHOLD = 0.70  # ≥70% total readings = operational
 DEGRADED_OVERALL_THRESHOLD = 0.40  # 40-70% = degraded
+# CSV pages: keep Date/Time as text (parsed once later), read readings straight into float32
+CSV_CONVERT = pa_csv.ConvertOptions(
+    column_types={"Date": pa.string(), "Time": pa.string(), **{lid: pa.float32() for lid in LOCATION_ID_TO_NAME}},
+)
+
+
+# Singapore has kept UTC+8 with no DST since 1982: a fixed offset gives the same
+# wall clock as a zoneinfo lookup, without the import and lookup on every call
+SGT = timezone(timedelta(hours=8), "SGT")
 
 
 def expected_minutes_for_date(target_date, now_sgt=None):
     """Return the minutes that should exist for a Singapore calendar date."""
-    try:
-        import zoneinfo
-    except ImportError:
-        from backports import zoneinfo
-
-    sgt = zoneinfo.ZoneInfo("Asia/Singapore")
-    now_sgt = now_sgt or datetime.now(sgt)
+    now_sgt = now_sgt or datetime.now(SGT)
     if target_date < now_sgt.date():
         return READINGS_PER_DAY
     if target_date > now_sgt.date():
@@ -63,6 +105,8 @@ def expected_minutes_for_date(target_date, now_sgt=None):
 
 
 def expected_minutes_for_range(start_date, end_date, now_sgt=None):
+    # One clock read for the whole range
+    now_sgt = now_sgt or datetime.now(SGT)
     return sum(
         expected_minutes_for_date(single_date.date(), now_sgt)
         for single_date in pd.date_range(start_date, end_date, freq="D")
@@ -71,149 +115,260 @@ def expected_minutes_for_range(start_date, end_date, now_sgt=None):
 
 def data_coverage_pct(df, expected_timestamps, location_cols):
     expected_readings = expected_timestamps * len(location_cols)
-    actual_readings = sum(df[loc].notna().sum() for loc in location_cols if loc in df.columns)
+    actual_readings = int(df[[loc for loc in location_cols if loc in df.columns]].count().sum())
     coverage = (actual_readings / expected_readings * 100) if expected_readings else 0.0
     return min(coverage, 100.0), actual_readings, expected_readings
 
 
-def get_noise_color(value):
-    """Get color for noise level."""
-    if pd.isna(value):
-        return "#6c757d"  # Gray
-    if value < 50:
-        return "#28a745"  # Green - Quiet
-    elif value < 70:
-        return "#ffc107"  # Yellow - Moderate
-    elif value < 85:
-        return "#fd7e14"  # Orange - Loud
-    else:
-        return "#dc3545"  # Red - Very Loud
-
-
-def get_noise_category(value):
-    """Categorize noise level."""
-    if pd.isna(value):
-        return "N/A"
-    if value < 50:
-        return "Quiet"
-    elif value < 70:
-        return "Moderate"
-    elif value < 85:
-        return "Loud"
-    else:
-        return "Very Loud"
+# Noise bands: < 50 Quiet, < 70 Moderate, < 85 Loud, else Very Loud
+NOISE_THRESHOLDS = np.array([50.0, 70.0, 85.0])
+NOISE_COLORS = np.array(["#28a745", "#ffc107", "#fd7e14", "#dc3545"])  # Green, Yellow, Orange, Red
+NOISE_CATEGORIES = np.array(["Quiet", "Moderate", "Loud", "Very Loud"])
+
+
+def classify_noise(values):
+    """(colors, categories) arrays for an array of dB values; NaN maps to gray / N/A."""
+    values = np.asarray(values, dtype=float)
+    # side="right": a value equal to a threshold falls in the band above it
+    band = np.searchsorted(NOISE_THRESHOLDS, values, side="right")
+    missing = np.isnan(values)
+    colors = np.where(missing, "#6c757d", NOISE_COLORS[band])
+    categories = np.where(missing, "N/A", NOISE_CATEGORIES[band])
+    return colors, categories
+
+
+# Filter-result frequency: 0 None, < 10 Low, < 50 Medium, < 100 High, else Very High
+FREQUENCY_THRESHOLDS = np.array([1, 10, 50, 100])
+FREQUENCY_LEVELS = np.array(["None", "Low", "Medium", "High", "Very High"])
+
+
+STATUS_ICONS = {'ONLINE': '✅', 'DEGRADED': '⚠️', 'OFFLINE': '❌'}
+STATUS_MESSAGES = {'ONLINE': 'Fully operational', 'DEGRADED': 'Monitor closely', 'OFFLINE': 'Needs maintenance'}
+STATUS_SEVERITIES = {'ONLINE': 'Operational', 'DEGRADED': 'Monitor', 'OFFLINE': 'CRITICAL'}
+# Card sort order: problems first
+STATUS_ORDER = {'OFFLINE': 0, 'DEGRADED': 1, 'ONLINE': 2}
+
+# Page stylesheet, sent once per run from main(); health cards only carry class names
+APP_CSS = """
+    <style>
+    .main-header { font-size: 2.5rem; font-weight: 700; color: #1f77b4; margin-bottom: 0.5rem; }
+    .sub-header { font-size: 1.1rem; color: #666; margin-bottom: 2rem; }
+    .metric-card { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 1.5rem; border-radius: 10px; color: white; text-align: center; box-shadow: 0 4px 6px rgba(0,0,0,0.1); }
+    .latest-reading-card { padding: 1rem; border-radius: 8px; margin-bottom: 1rem; border-left: 5px solid; background-color: #f8f9fa; transition: transform 0.2s; }
+    .latest-reading-card:hover { transform: translateY(-2px); box-shadow: 0 4px 8px rgba(0,0,0,0.15); }
+    .section-divider { margin: 2rem 0; border-top: 2px solid #e9ecef; }
+    .info-badge { display: inline-block; padding: 0.25rem 0.75rem; border-radius: 12px; font-size: 0.85rem; font-weight: 600; margin-left: 0.5rem; }
+    .health-card { border-left: 5px solid; border-radius: 8px; padding: 1rem; margin-bottom: 0.5rem; display: flex; flex-direction: column; justify-content: space-between; }
+    .health-card.online { background-color: #d4edda; border-left-color: #28a745; color: #155724; }
+    .health-card.degraded { background-color: #fff3cd; border-left-color: #ffc107; color: #856404; }
+    .health-card.offline { background-color: #f8d7da; border-left-color: #dc3545; color: #721c24; }
+    .health-card.day { height: 160px; }
+    .health-card.range { height: 220px; }
+    .hc-loc { font-size: 0.85rem; font-weight: 600; color: #333; }
+    .hc-status { font-weight: bold; }
+    .day .hc-status { font-size: 1.5rem; }
+    .range .hc-status { font-size: 1.3rem; }
+    .hc-count { font-size: 1.1rem; font-weight: 600; color: #333; }
+    .hc-pct { font-size: 0.9rem; color: #666; }
+    .hc-note { font-size: 0.8rem; }
+    .hc-days { font-size: 0.9rem; color: #333; }
+    .hc-readings { font-size: 0.85rem; color: #666; }
+    .hc-incidents { font-size: 0.85rem; color: #d63384; margin-top: 0.25rem; }
+    .hc-issues { font-size: 0.75rem; margin-top: 0.25rem; }
+    .hc-severity { font-size: 0.8rem; font-weight: 600; margin-top: 0.25rem; }
+    .lr-loc { font-size: 0.9rem; font-weight: 600; color: #333; }
+    .lr-value { font-size: 2rem; font-weight: bold; margin: 0.25rem 0; }
+    .lr-badge { color: white; margin-left: 0; }
+    .lr-time { font-size: 0.8rem; color: #666; margin-top: 0.5rem; }
+    </style>
+"""
+
+# Sensor health card templates, filled per sensor with str.format_map
+DAY_HEALTH_CARD = (
+    '<div class="health-card day {status_class}">'
+    '<div class="hc-loc">📍 {loc}</div>'
+    '<div class="hc-status">{icon} {status}</div>'
+    '<div class="hc-count">{reading_count:,}/{expected:,}</div>'
+    '<div class="hc-pct">{completeness:.1f}% complete</div>'
+    '<div class="hc-note">{message}</div>'
+    '</div>'
+)
+RANGE_HEALTH_CARD = (
+    '<div class="health-card range {status_class}">'
+    '<div class="hc-loc">📍 {loc}</div>'
+    '<div class="hc-status">{icon} {status} ({completeness_int}%)</div>'
+    '<div class="hc-days"><strong>Days online:</strong> {online_days}/{total_days}</div>'
+    '<div class="hc-readings"><strong>Readings:</strong> {total_readings:,}/{expected_readings:,}</div>'
+    '{incidents_html}'
+    '<div class="hc-issues">{issues_text}</div>'
+    '<div class="hc-severity">{severity}</div>'
+    '</div>'
+)
+# Latest-reading card; only the noise-band color varies, so it stays inline
+LATEST_READING_CARD = (
+    '<div class="latest-reading-card" style="border-left-color: {color};">'
+    '<div class="lr-loc">📍 {loc}</div>'
+    '<div class="lr-value" style="color: {color};">{value_text}</div>'
+    '<span class="info-badge lr-badge" style="background-color: {color};">{category}</span>'
+    '<div class="lr-time">🕒 {when}</div>'
+    '</div>'
+)
+
+
+def sort_by_keys(items, keys):
+    """items ordered by a precomputed key per item (stable), without a per-comparison lambda."""
+    return [items[i] for i in sorted(range(len(items)), key=keys.__getitem__)]
+
+
+def render_card_grid(cards):
+    """Emit a whole 3-column card grid with one st.markdown instead of one per card.
+
+    Cards must be single-line HTML: indented lines would turn into Markdown code blocks.
+    """
+    if cards:
+        st.markdown(
+            '<div style="display: grid; grid-template-columns: repeat(3, 1fr); column-gap: 1rem;">'
+            + "".join(cards) + '</div>',
+            unsafe_allow_html=True,
+        )
+
+
+def section_heading(title):
+    """Divider plus '### title' as one st.markdown delta instead of two."""
+    st.markdown(f'<div class="section-divider"></div>\n\n### {title}', unsafe_allow_html=True)
 
 
 def get_sensor_health_single_date(df, target_date, location_cols):
-    day_df = df[df['Date'] == target_date]
+    day_df = df[df['Date'] == pd.Timestamp(target_date)]
     expected = max(expected_minutes_for_date(target_date), 1)
 
     if day_df.empty:
         return {loc: {'reading_count': 0, 'completeness': 0.0, 'status': 'OFFLINE', 'expected': expected}
                 for loc in location_cols}
 
-    health = {}
-    for loc in location_cols:
-        valid_count = day_df[loc].notna().sum() if loc in day_df.columns else 0
-        completeness = min(valid_count / expected * 100, 100.0)
-
-        if completeness >= DEGRADED_THRESHOLD * 100:
-            status = 'ONLINE'
-        elif completeness >= OFFLINE_THRESHOLD * 100:
-            status = 'DEGRADED'
-        else:
-            status = 'OFFLINE'
+    present = [loc for loc in location_cols if loc in day_df.columns]
+    counts = day_df[present].count().reindex(location_cols, fill_value=0)
+    completeness = (counts / expected * 100).clip(upper=100.0)
+    statuses = np.select(
+        [completeness >= DEGRADED_THRESHOLD * 100, completeness >= OFFLINE_THRESHOLD * 100],
+        ['ONLINE', 'DEGRADED'],
+        'OFFLINE',
+    )
 
+    health = {}
+    for loc, status in zip(location_cols, statuses):
         health[loc] = {
-            'reading_count': valid_count,
-            'completeness': completeness,
-            'status': status,
+            'reading_count': int(counts[loc]),
+            'completeness': completeness[loc],
+            'status': str(status),
             'expected': expected,
         }
 
     return health
 
 
-def get_sensor_health_date_range(df, start_date, end_date, location_cols):
-    """Calculate sensor health across a date range (per-day accuracy)."""
-    dates_with_expected_data = [
-        single_date.date()
-        for single_date in pd.date_range(start_date, end_date, freq='D')
-        if expected_minutes_for_date(single_date.date()) > 0
-    ]
-    total_days = len(dates_with_expected_data)
-    expected_readings = expected_minutes_for_range(start_date, end_date)
-    health = {}
-
-    for loc in location_cols:
-        online_days = 0
-        offline_dates = []
-        degraded_dates = []
+def get_sensor_health_date_range(df, start_date, end_date, location_cols, daily_counts=None):
+    """Calculate sensor health across a date range (per-day accuracy).
 
-        for single_date in dates_with_expected_data:
-            day_df = df[df['Date'] == single_date]
-            expected_for_day = expected_minutes_for_date(single_date)
-
-            if day_df.empty or loc not in day_df.columns:
-                offline_dates.append(single_date)
-                continue
-
-            valid_count = day_df[loc].notna().sum()
-
-            completeness = min(valid_count / expected_for_day * 100, 100.0)
+    daily_counts (from fetch_daily_counts) replaces counting df's rows when given.
+    """
+    days = pd.date_range(start_date, end_date, freq='D')
+    now_sgt = datetime.now(SGT)
+    expected_per_day = pd.Series([expected_minutes_for_date(d.date(), now_sgt) for d in days], index=days, dtype=float)
+    # Same per-day figures as expected_minutes_for_range, without a second pass
+    expected_readings = int(expected_per_day.sum())
+    expected_per_day = expected_per_day[expected_per_day > 0]
+    dates_with_expected_data = expected_per_day.index
+    total_days = len(dates_with_expected_data)
 
-            if completeness >= DEGRADED_THRESHOLD * 100:
-                online_days += 1
-            elif completeness >= OFFLINE_THRESHOLD * 100:
-                degraded_dates.append(single_date)
-            else:
-                offline_dates.append(single_date)
+    present = [loc for loc in location_cols if loc in df.columns]
 
-        total_readings = df[loc].notna().sum() if loc in df.columns else 0
-        uptime_pct = (online_days / total_days * 100) if total_days > 0 else 0
-        completeness_pct = min(total_readings / expected_readings * 100, 100.0) if expected_readings > 0 else 0
+    # One groupby pass: (days x locations) matrix of valid readings; totals are its column sums
+    if daily_counts is not None:
+        counts = daily_counts
+    elif 'Date' in df.columns:
+        counts = df.groupby('Date')[present].count()
+    else:
+        counts = df[present].count().to_frame().T
+    total_readings = counts.sum().reindex(location_cols, fill_value=0).to_numpy()
+    counts = counts.reindex(index=dates_with_expected_data, columns=location_cols, fill_value=0)
+
+    completeness = counts.div(expected_per_day, axis=0).mul(100).clip(upper=100.0)
+    online = completeness >= DEGRADED_THRESHOLD * 100
+    degraded = ~online & (completeness >= OFFLINE_THRESHOLD * 100)
+    offline = ~online & ~degraded
+    online_days = online.sum().to_numpy()
+
+    if expected_readings > 0:
+        completeness_pct = np.minimum(total_readings / expected_readings * 100, 100.0)
+    else:
+        completeness_pct = np.zeros(len(location_cols))
+    statuses = np.select(
+        [completeness_pct >= ONLINE_OVERALL_THRESHOLD * 100, completeness_pct >= DEGRADED_OVERALL_THRESHOLD * 100],
+        ['ONLINE', 'DEGRADED'],
+        'OFFLINE',
+    )
 
-        if completeness_pct >= ONLINE_OVERALL_THRESHOLD * 100:
-            status = 'ONLINE'
-        elif completeness_pct >= DEGRADED_OVERALL_THRESHOLD * 100:
-            status = 'DEGRADED'
-        else:
-            status = 'OFFLINE'
+    # Card labels: every day formatted once here, then sliced per sensor
+    day_labels = np.asarray(dates_with_expected_data.strftime('%b %d'), dtype=object)
 
+    health = {}
+    for i, (loc, status) in enumerate(zip(location_cols, statuses)):
+        offline_mask, degraded_mask = offline[loc].to_numpy(), degraded[loc].to_numpy()
         health[loc] = {
-            'online_days': online_days,
+            'online_days': int(online_days[i]),
             'total_days': total_days,
-            'uptime_pct': uptime_pct,
-            'completeness_pct': completeness_pct,
-            'total_readings': total_readings,
+            'uptime_pct': (online_days[i] / total_days * 100) if total_days > 0 else 0,
+            'completeness_pct': float(completeness_pct[i]),
+            'total_readings': int(total_readings[i]),
             'expected_readings': expected_readings,
-            'status': status,
-            'offline_dates': offline_dates,
-            'degraded_dates': degraded_dates
+            'status': str(status),
+            'offline_dates': dates_with_expected_data[offline_mask].date.tolist(),
+            'degraded_dates': dates_with_expected_data[degraded_mask].date.tolist(),
+            'offline_dates_str': ', '.join(day_labels[offline_mask]),
+            'degraded_dates_str': ', '.join(day_labels[degraded_mask]),
         }
 
     return health
 
 
+def frame_version(df):
+    """Stand-in for hashing a whole frame: its columns plus a hash of every (Date, Time)
+    row, so a minute backfilled or dropped anywhere in the range changes the key."""
+    if df.empty:
+        return (tuple(df.columns), 0)
+    row_hashes = pd.util.hash_pandas_object(df[["Date", "Time"]], index=False)
+    return (tuple(df.columns), len(df), int(row_hashes.sum()))
+
+
+@st.cache_data(ttl=300, max_entries=16, show_spinner=False)
+def cached_sensor_health_date_range(start_date, end_date, location_cols, data_version, _df, daily_counts=None):
+    """get_sensor_health_date_range memoized on the range, sensors and data_version:
+    frame_version(_df) plus the value bounds that shaped _df.
+
+    Reruns that only touch the page, value filter or exports reuse the last result.
+    """
+    return get_sensor_health_date_range(_df, start_date, end_date, list(location_cols), daily_counts)
+
+
 def detect_persisted_noise_incidents(df, location_cols, min_db, max_db, duration_minutes):
     incidents = []
     if df.empty or not location_cols:
         return incidents
 
-    df_sorted = df.copy()
-    df_sorted['_dt'] = pd.to_datetime(
-        df_sorted['Date'].astype(str) + ' ' + df_sorted['Time'].astype(str),
-        errors='coerce'
+    # No defensive copies: assign/selection share df's columns under copy-on-write.
+    # Date is already datetime64; add the time of day instead of re-parsing strings
+    df_sorted = (
+        df.assign(_dt=df['Date'] + pd.to_timedelta(df['Time'].astype(str), errors='coerce'))
+        .dropna(subset=['_dt']).sort_values('_dt').reset_index(drop=True)
     )
-    df_sorted = df_sorted.dropna(subset=['_dt']).sort_values('_dt').reset_index(drop=True)
 
     for loc in location_cols:
         if loc not in df_sorted.columns:
             continue
 
-        loc_df = df_sorted[['_dt', loc]].copy()
-        loc_df[loc] = pd.to_numeric(loc_df[loc], errors='coerce')
-        loc_df = loc_df[loc_df[loc].between(min_db, max_db, inclusive='both')]
+        values = pd.to_numeric(df_sorted[loc], errors='coerce')
+        loc_df = df_sorted[['_dt']].assign(**{loc: values})[values.between(min_db, max_db, inclusive='both')]
 
         if loc_df.empty:
             continue
@@ -237,6 +392,24 @@ def detect_persisted_noise_incidents(df, location_cols, min_db, max_db, duration
     return sorted(incidents, key=lambda inc: inc['start_time'], reverse=True)
 
 
+def render_incidents_table(incidents):
+    """Incident list as one st.dataframe; times and dB are formatted by the frontend,
+    not by string/rounded copies of the columns."""
+    st.dataframe(
+        pd.DataFrame(incidents, columns=['location', 'start_time', 'end_time', 'duration', 'peak_db', 'avg_db']),
+        column_config={
+            'location': st.column_config.TextColumn('Location'),
+            'start_time': st.column_config.DatetimeColumn('Start Time', format='MMM DD, HH:mm'),
+            'end_time': st.column_config.DatetimeColumn('End Time', format='MMM DD, HH:mm'),
+            'duration': st.column_config.NumberColumn('Duration (min)'),
+            'peak_db': st.column_config.NumberColumn('Peak dB', format='%.1f'),
+            'avg_db': st.column_config.NumberColumn('Avg dB', format='%.1f'),
+        },
+        use_container_width=True,
+        hide_index=True,
+    )
+
+
 def render_persisted_noise_incidents(df, location_cols, min_db, max_db, duration_minutes):
     st.markdown("---")
     st.markdown(f"### 🔊 Persisted Noise Incidents ({min_db}-{max_db}dB, {duration_minutes}+ min)")
@@ -252,15 +425,7 @@ def render_persisted_noise_incidents(df, location_cols, min_db, max_db, duration
         num_locations = len(set(inc['location'] for inc in incidents))
         st.success(f"🔍 Found **{len(incidents)}** incidents across **{num_locations}** locations")
 
-        incidents_df = pd.DataFrame(incidents)
-        incidents_df['start_time_display'] = incidents_df['start_time'].dt.strftime('%b %d, %H:%M')
-        incidents_df['end_time_display'] = incidents_df['end_time'].dt.strftime('%b %d, %H:%M')
-        incidents_df['peak_db'] = incidents_df['peak_db'].round(1)
-        incidents_df['avg_db'] = incidents_df['avg_db'].round(1)
-
-        display_df = incidents_df[['location', 'start_time_display', 'end_time_display', 'duration', 'peak_db', 'avg_db']].copy()
-        display_df.columns = ['Location', 'Start Time', 'End Time', 'Duration (min)', 'Peak dB', 'Avg dB']
-        st.dataframe(display_df, use_container_width=True, hide_index=True)
+        render_incidents_table(incidents)
     else:
         numeric_cols = [c for c in location_cols if c in df.columns]
         max_seen = pd.to_numeric(df[numeric_cols].stack(), errors='coerce').max() if numeric_cols else pd.NA
@@ -270,9 +435,17 @@ def render_persisted_noise_incidents(df, location_cols, min_db, max_db, duration
     st.markdown("---")
     return incidents
 
-@st.cache_resource(ttl=300)
+# Request timeout (s) for PostgREST calls; one slow day shouldn't hang the page
+POSTGREST_TIMEOUT = 30
+
+
+@st.cache_resource(show_spinner=False)
 def get_client():
-    """Create Supabase client from env or Streamlit secrets."""
+    """Create Supabase client from env or Streamlit secrets.
+
+    Built once per process and shared by every rerun and fetch thread, so its
+    HTTP connection pool (and TLS sessions) is reused.
+    """
     load_dotenv()
 
     url = os.getenv("SUPABASE_URL") or st.secrets.get("SUPABASE_URL")
@@ -284,92 +457,504 @@ def get_client():
             "Set them as environment variables or in .streamlit/secrets.toml."
         )
 
-    return create_client(url, key)
+    install_orjson_response()
+    return create_client(url, key, options=ClientOptions(postgrest_client_timeout=POSTGREST_TIMEOUT))
 
-@st.cache_data(ttl=300)
-def fetch_all_data(start_date=None, end_date=None, batch_size=1000, columns=None) -> pd.DataFrame:
-    """Fetch ALL data matching date filters."""
-    supabase = get_client()
-    all_data = []
-    offset = 0
-    select_cols = ",".join(["Date", "Time"] + columns) if columns else "*"
+def wide_select(ids) -> str:
+    """DEFAULT_VIEW select list for Date, Time and ids; a column the view still names
+    by its old id is aliased back (16367:16026), so the frame is keyed by current ids."""
+    cols = [f"{lid}:{WIDE_COLUMN_FOR_ID[lid]}" if lid in WIDE_COLUMN_FOR_ID else lid for lid in ids]
+    return ",".join(["Date", "Time", *cols])
 
+
+def value_range_filter(columns, vmin=None, vmax=None):
+    """PostgREST or= expression keeping rows where ANY column is within [vmin, vmax]."""
+    clauses = []
+    for lid in columns:
+        col = WIDE_COLUMN_FOR_ID.get(lid, lid)
+        bounds = []
+        if vmin is not None:
+            bounds.append(f"{col}.gte.{vmin}")
+        if vmax is not None:
+            bounds.append(f"{col}.lte.{vmax}")
+        clauses.append(bounds[0] if len(bounds) == 1 else f"and({','.join(bounds)})")
+    return ",".join(clauses)
+
+
+def rows_to_frame(rows) -> pd.DataFrame:
+    """Build an Arrow-backed frame from the JSON rows, so numbers arrive typed."""
+    try:
+        return pa.Table.from_pylist(rows or []).to_pandas(types_mapper=pd.ArrowDtype)
+    except pa.ArrowInvalid:
+        # A column mixing numbers and strings has no single Arrow type
+        return pd.DataFrame(rows)
+
+
+def csv_to_table(text):
+    """Parse one PostgREST text/csv page; location columns come out float32, Date/Time as strings."""
+    if not text or not text.strip():
+        return None
+    try:
+        return pa_csv.read_csv(io.BytesIO(text.encode()), convert_options=CSV_CONVERT)
+    except pa.ArrowInvalid:
+        # Stray non-numeric cells: coerce them to null, like as_float32 does
+        page = pd.read_csv(io.StringIO(text), dtype={"Date": str, "Time": str})
+        ids = [c for c in page.columns if c in LOCATION_ID_TO_NAME]
+        page[ids] = page[ids].apply(pd.to_numeric, errors="coerce")
+        schema = pa.schema([(c, pa.float32() if c in ids else pa.string()) for c in page.columns])
+        return pa.Table.from_pandas(page, schema=schema, preserve_index=False)
+
+
+@st.cache_data(ttl=300, show_spinner=False, max_entries=8)
+def export_csv_bytes(signature, _df: pd.DataFrame) -> bytes:
+    """CSV bytes for the filtered frame; keyed on the filter signature so the
+    (large) frame itself never has to be hashed."""
+    df = for_export(_df)
+    buf = io.BytesIO()
+    # Header via the csv module, so only names that need it ("Jurong Safra, Block C") get quoted
+    header = io.StringIO()
+    csv.writer(header, lineterminator="\n").writerow(df.columns)
+    buf.write(header.getvalue().encode())
     try:
-        while True:
-            query = supabase.table(DEFAULT_VIEW).select(select_cols)
+        # Arrow's C++ writer straight into the buffer; no intermediate Python str
+        pa_csv.write_csv(
+            pa.Table.from_pandas(df, preserve_index=False), buf,
+            pa_csv.WriteOptions(include_header=False, quoting_style="none"),
+        )
+    except pa.ArrowInvalid:
+        # A value that would need quoting; let pandas handle it
+        buf = io.BytesIO()
+        df.to_csv(buf, index=False)
+    return buf.getvalue()
+
+
+@st.cache_data(ttl=300, show_spinner=False, max_entries=8)
+def export_xlsx_bytes(signature, _df: pd.DataFrame) -> bytes:
+    """Excel bytes for the filtered frame, keyed like export_csv_bytes."""
+    return xlsx_bytes(_df)
 
-            if start_date:
-                query = query.gte("Date", str(start_date))
-            if end_date:
-                query = query.lte("Date", str(end_date))
 
-            query = query.order("Date", desc=True).order("Time", desc=True).range(offset, offset + batch_size - 1)
+def _fetch_keyset(supabase, select_cols, start_iso, end_iso, value_filter, batch_size) -> list:
+    """All rows in [start_iso, end_iso], newest first, as Arrow tables paged with a keyset cursor.
 
-            resp = query.execute()
-            batch = resp.data or []
+    Pages come back as CSV: column names once per page instead of once per
+    row in JSON, parsed by Arrow straight into typed columns.
+    """
+    tables = []
+    # Keyset cursor: (Date, Time) of the last row seen, so Postgres never re-scans skipped rows
+    cursor = None
 
-            if not batch:
-                break
+    while True:
+        query = supabase.table(DEFAULT_VIEW).select(select_cols)
 
-            all_data.extend(batch)
+        if start_iso:
+            query = query.gte("Date", start_iso)
+        if end_iso:
+            query = query.lte("Date", end_iso)
+        if value_filter:
+            query = query.or_(value_filter)
+        if cursor:
+            last_date, last_time = cursor
+            # PostgREST ANDs separate or= params, so this composes with value_filter
+            query = query.or_(f"Date.lt.{last_date},and(Date.eq.{last_date},Time.lt.{last_time})")
 
-            if len(batch) < batch_size:
-                break
+        query = query.order("Date", desc=True).order("Time", desc=True).limit(batch_size)
 
-            offset += batch_size
+        batch = csv_to_table(query.csv().execute().data)
 
-        return pd.DataFrame(all_data)
+        if batch is None or batch.num_rows == 0:
+            break
 
+        tables.append(batch)
+
+        if batch.num_rows < batch_size:
+            break
+
+        cursor = (batch["Date"][-1].as_py(), batch["Time"][-1].as_py())
+
+    return tables
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _fetch_all_cached(start_iso, end_iso, columns, vmin, vmax, batch_size) -> pd.DataFrame:
+    """Cached body of fetch_all_data; arguments are hashable primitives/tuples only."""
+    supabase = get_client()
+    select_cols = wide_select(columns) if columns else "*"
+    value_filter = value_range_filter(columns, vmin, vmax) if columns and (vmin is not None or vmax is not None) else None
+
+    if start_iso and end_iso:
+        # One keyset stream per day, run concurrently; newest day first keeps the overall order
+        days = [d.date().isoformat() for d in pd.date_range(start_iso, end_iso, freq="D")][::-1]
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+            parts = pool.map(
+                lambda day: _fetch_keyset(supabase, select_cols, day, day, value_filter, batch_size),
+                days,
+            )
+            tables = [table for part in parts for table in part]
+    else:
+        tables = _fetch_keyset(supabase, select_cols, start_iso, end_iso, value_filter, batch_size)
+
+    if not tables:
+        return pd.DataFrame()
+    df = pa.concat_tables(tables, promote_options="permissive").to_pandas(types_mapper=pd.ArrowDtype)
+    if "Date" in df.columns:
+        # Parsed once here, so the cached frame already holds datetime64
+        df["Date"] = pd.to_datetime(df["Date"], format="%Y-%m-%d", cache=True)
+    return df
+
+
+def fetch_all_data(start_date=None, end_date=None, batch_size=1000, columns=None, vmin=None, vmax=None) -> pd.DataFrame:
+    """Fetch ALL data matching date filters (and value filters, when given)."""
+    # Normalize the cache key: selection click order shouldn't miss the cache
+    ids = ordered_ids(columns) if columns else None
+    try:
+        return _fetch_all_cached(
+            str(start_date) if start_date else None,
+            str(end_date) if end_date else None,
+            ids, vmin, vmax, batch_size,
+        )
     except Exception as e:
+        # Reported outside the cached function so a failed fetch isn't cached
         st.error(f"Error fetching all data from {DEFAULT_VIEW}: {e}")
         return pd.DataFrame()
 
 
-def filter_frame(df: pd.DataFrame, start_date, end_date, location_ids, vmin, vmax):
-    if df.empty:
-        return df
+@st.cache_resource
+def _prefetch_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=1)
 
-    df = df.copy()
 
-    if "Date" in df.columns:
-        df["Date"] = pd.to_datetime(df["Date"]).dt.date
+def prefetch_previous_range(start_date, end_date, columns, batch_size=1000) -> None:
+    """Warm fetch_all_data's cache for the equally long window just before
+    [start_date, end_date], so stepping the date range back is instant."""
+    if start_date is None or end_date is None:
+        return
+    span = end_date - start_date + timedelta(days=1)
+    prev_start, prev_end = start_date - span, start_date - timedelta(days=1)
+    ids = ordered_ids(columns) if columns else None
+    key = (str(prev_start), str(prev_end), ids)
+    pending = st.session_state.setdefault("prefetched_ranges", set())
+    if key in pending:
+        return
+    pending.add(key)
+    # The cached body directly: a background thread has no page to st.error onto
+    _prefetch_executor().submit(_fetch_all_cached, *key, None, None, batch_size)
+
+
+def _fetch_long_keyset(supabase, meter_ids, start_utc, end_utc, vmin, vmax, batch_size) -> list:
+    """In-range (location_id, reading_value, reading_datetime) rows for one UTC window, newest first."""
+    rows = []
+    cursor = None
+
+    while True:
+        query = (
+            supabase.table(READINGS_TABLE)
+            .select("location_id,reading_value,reading_datetime")
+            .in_("location_id", meter_ids)
+            .gte("reading_datetime", start_utc)
+            .lt("reading_datetime", end_utc)
+        )
+        if vmin is not None:
+            query = query.gte("reading_value", vmin)
+        if vmax is not None:
+            query = query.lte("reading_value", vmax)
+        if cursor:
+            last_ts, last_id = cursor
+            query = query.or_(
+                f'reading_datetime.lt."{last_ts}",'
+                f'and(reading_datetime.eq."{last_ts}",location_id.lt.{last_id})'
+            )
 
-    if start_date is not None and end_date is not None:
-        df = df[(df["Date"] >= start_date) & (df["Date"] <= end_date)]
+        query = query.order("reading_datetime", desc=True).order("location_id", desc=True).limit(batch_size)
 
-    id_cols = [c for c in df.columns if c not in ("Date", "Time")]
-    keep_ids = [lid for lid in id_cols if lid in location_ids]
+        batch = query.execute().data or []
+        if not batch:
+            break
 
-    if keep_ids:
-        df = df[["Date", "Time"] + keep_ids]
-    else:
-        df = df[["Date", "Time"]]
+        rows.extend(batch)
 
-    for col in keep_ids:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
+        if len(batch) < batch_size:
+            break
 
-    if keep_ids and (vmin is not None or vmax is not None):
-        mask = pd.Series([False] * len(df), index=df.index)
+        cursor = (batch[-1]["reading_datetime"], batch[-1]["location_id"])
+
+    return rows
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _fetch_long_cached(start_iso, end_iso, ids, vmin, vmax, batch_size) -> pd.DataFrame:
+    """Cached body of fetch_long_data: only in-range cells travel, pivoted to the wide layout here."""
+    supabase = get_client()
+    meter_ids = list(ids) + [old for old, new in LOCATION_ID_ALIASES.items() if new in ids]
+
+    # Dates are Singapore calendar days; reading_datetime is stored in UTC
+    days = pd.date_range(start_iso, end_iso, freq="D", tz="Asia/Singapore")[::-1]
+    windows = [(d.tz_convert("UTC").isoformat(), (d + pd.Timedelta(days=1)).tz_convert("UTC").isoformat()) for d in days]
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        parts = pool.map(
+            lambda w: _fetch_long_keyset(supabase, meter_ids, w[0], w[1], vmin, vmax, batch_size),
+            windows,
+        )
+        all_data = [row for part in parts for row in part]
+
+    long = rows_to_frame(all_data)
+    if long.empty:
+        return long
+
+    ts = pd.to_datetime(long["reading_datetime"], utc=True).dt.tz_convert("Asia/Singapore").dt.floor("min")
+    long = pd.DataFrame({
+        "Date": ts.dt.tz_localize(None).dt.normalize(),
+        "Time": MINUTE_LABELS[(ts.dt.hour * 60 + ts.dt.minute).to_numpy()],
+        "loc": long["location_id"].replace(LOCATION_ID_ALIASES),
+        # float32 from the start: the grouping, pivot and cached frame all carry half the bytes
+        "value": long["reading_value"].to_numpy(dtype=np.float32, na_value=np.nan),
+    })
+    # Same MAX-per-minute as the wide view, but over the in-range cells only
+    wide = (
+        long.groupby(["Date", "Time", "loc"], sort=False)["value"].max()
+        .unstack("loc")
+        .reindex(columns=list(ids))
+        .sort_index(ascending=False)
+        .reset_index()
+    )
+    wide.columns.name = None
+    # Cached in the wide view's dtype, so filter_frame's cast is a no-op on every rerun
+    return wide.assign(**as_float32(wide[list(ids)]))
+
+
+def fetch_long_data(start_date, end_date, location_ids, vmin=None, vmax=None, batch_size=1000):
+    """Value-filtered rows straight from READINGS_TABLE, in fetch_all_data's wide layout.
+
+    Cells outside [vmin, vmax] never leave the database. Returns None when the
+    long table can't be queried, so callers fall back to the wide view.
+    """
+    ids = ordered_ids(location_ids)
+    if not ids or start_date is None or end_date is None:
+        return None
+    try:
+        return _fetch_long_cached(str(start_date), str(end_date), ids, vmin, vmax, batch_size)
+    except Exception:
+        return None
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _fetch_daily_counts_cached(start_iso, end_iso, ids) -> pd.DataFrame:
+    resp = (
+        get_client().table(DAILY_COUNTS_VIEW)
+        .select(",".join(["Date", *ids]))
+        .gte("Date", start_iso)
+        .lte("Date", end_iso)
+        .execute()
+    )
+    return rows_to_frame(resp.data)
+
+
+def fetch_daily_counts(start_date, end_date, location_ids):
+    """Per-day reading counts (Date x location name) from DAILY_COUNTS_VIEW.
+
+    Returns None when the rollup view is missing or empty, so callers fall
+    back to counting minute rows themselves.
+    """
+    ids = ordered_ids(location_ids)
+    if not ids or start_date is None or end_date is None:
+        return None
+    try:
+        counts = _fetch_daily_counts_cached(str(start_date), str(end_date), ids)
+    except Exception:
+        return None
+    if counts.empty:
+        return None
+    counts.index = pd.to_datetime(counts.pop("Date"), format="%Y-%m-%d")
+    return counts.astype("int64").rename(columns=LOCATION_ID_TO_NAME)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _fetch_latest_cached(ids) -> pd.DataFrame:
+    meter_ids = list(ids) + [old for old, new in LOCATION_ID_ALIASES.items() if new in ids]
+    resp = (
+        get_client().table(LATEST_VIEW)
+        .select("location_id,reading_value,reading_time")
+        .in_("location_id", meter_ids)
+        .execute()
+    )
+    latest = rows_to_frame(resp.data)
+    if latest.empty:
+        return latest
+    # A meter reporting under both its old and new id keeps only the newer reading
+    latest["location_id"] = latest["location_id"].astype(str).replace(LOCATION_ID_ALIASES)
+    latest = latest.sort_values("reading_time", ascending=False)
+    return latest.drop_duplicates("location_id").reset_index(drop=True)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _fetch_latest_row_cached(ids) -> pd.DataFrame:
+    """Fallback for a missing LATEST_VIEW: the single newest wide-view row, reshaped
+    to the same (location_id, reading_value, reading_time) layout."""
+    resp = (
+        get_client().table(DEFAULT_VIEW)
+        .select(wide_select(ids))
+        .order("Date", desc=True).order("Time", desc=True)
+        .limit(1)
+        .execute()
+    )
+    if not resp.data:
+        return pd.DataFrame()
+    row = resp.data[0]
+    return pd.DataFrame({
+        "location_id": list(ids),
+        "reading_value": np.array([row.get(lid) for lid in ids], dtype=float),
+        "reading_time": f"{row['Date']}T{row['Time']}",
+    })
+
+
+def fetch_latest_readings(location_ids):
+    """Newest reading per selected location (at most 13 rows), or None if nothing can be queried."""
+    ids = ordered_ids(location_ids)
+    if not ids:
+        return None
+    try:
+        latest = _fetch_latest_cached(ids)
+    except Exception:
+        # No latest-readings view: one LIMIT 1 row still beats scanning the minute frame
+        try:
+            latest = _fetch_latest_row_cached(ids)
+        except Exception:
+            return None
+    return latest if not latest.empty else None
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def latest_reading_cards(latest: pd.DataFrame) -> list:
+    """Card HTML for the latest-readings frame (~13 rows, cached for the same 60s
+    as the frame itself), so unrelated reruns reuse the built strings."""
+    latest = latest.sort_values("reading_value", ascending=False)
+    values = latest["reading_value"].to_numpy(dtype=float, na_value=np.nan)
+    colors, categories = classify_noise(values)
+    # One parse/format for the whole column instead of one per card
+    whens = pd.to_datetime(latest["reading_time"]).dt.strftime("%b %d, %H:%M")
+
+    return [
+        LATEST_READING_CARD.format_map({
+            'color': color, 'category': category, 'when': when,
+            'loc': LOCATION_ID_TO_NAME.get(lid, lid),
+            'value_text': "N/A" if np.isnan(value) else f"{value:.1f} dB",
+        })
+        for lid, value, color, category, when in zip(latest["location_id"], values, colors, categories, whens)
+    ]
+
+
+def render_latest_readings(latest):
+    st.markdown("### 🔴 Latest Readings")
+    st.caption("Most recent reading received from each selected location")
+
+    render_card_grid(latest_reading_cards(latest))
+
+    st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
+
+
+def filter_frame(df: pd.DataFrame, start_date, end_date, location_ids, vmin, vmax, rows_prefiltered=False):
+    """Apply date/location/value filters. With rows_prefiltered, the query already
+    dropped rows outside the date (and value) range, so only the column pick and
+    per-cell blanking are left to do."""
+    if df.empty:
+        return df
 
-        for col in keep_ids:
-            col_mask = df[col].notna()
-            if vmin is not None:
-                col_mask = col_mask & (df[col] >= vmin)
-            if vmax is not None:
-                col_mask = col_mask & (df[col] <= vmax)
-            mask = mask | col_mask
+    # No defensive copy: every step below returns a new frame instead of writing into df
+    if "Date" in df.columns and not pd.api.types.is_datetime64_any_dtype(df["Date"]):
+        df = df.assign(Date=pd.to_datetime(df["Date"], format="%Y-%m-%d", cache=True))
 
-        df = df[mask]
+    id_cols = [c for c in df.columns if c not in META_COLS]
+    selected = set(location_ids)
+    keep_ids = [lid for lid in id_cols if lid in selected]
 
-        if not df.empty:
-            for col in keep_ids:
-                if vmin is not None:
-                    df.loc[df[col] < vmin, col] = pd.NA
-                if vmax is not None:
-                    df.loc[df[col] > vmax, col] = pd.NA
+    # Column projection is free under copy-on-write; rows are taken once, at the end
+    df = df[["Date", "Time"] + keep_ids]
+    if keep_ids:
+        df = df.assign(**as_float32(df[keep_ids]))
 
-    rename = {lid: LOCATION_ID_TO_NAME.get(lid, lid) for lid in keep_ids}
-    return df.rename(columns=rename)
+    keep = None
+    if start_date is not None and end_date is not None and not rows_prefiltered:
+        keep = ((df["Date"] >= pd.Timestamp(start_date)) & (df["Date"] <= pd.Timestamp(end_date))).to_numpy()
+
+    if keep_ids and (vmin is not None or vmax is not None):
+        # Round the bounds to float32 like the readings (70.1 is stored as 70.0999985),
+        # so at-bound values match what the query's gte/lte already let through
+        lo = -np.inf if vmin is None else float(np.float32(vmin))
+        hi = np.inf if vmax is None else float(np.float32(vmax))
+        # One contiguous float32 block for the row and cell masks
+        vals = df[keep_ids].to_numpy(dtype=np.float32, na_value=np.nan)
+        if not rows_prefiltered:
+            in_range = rows_any_in_range(vals, lo, hi)
+            keep = in_range if keep is None else keep & in_range
+        if keep is not None:
+            vals = vals[keep]
+
+        # One block-wide null mask; the reading columns are rebuilt straight from vals,
+        # so only Date/Time go through the row take
+        blank = out_of_range(vals, lo, hi) | np.isnan(vals)
+        base = df[["Date", "Time"]] if keep is None else df.loc[keep, ["Date", "Time"]]
+        df = base.assign(**{
+            col: pd.arrays.ArrowExtensionArray(pa.array(vals[:, j].astype(np.float32, copy=False), mask=blank[:, j]))
+            for j, col in enumerate(keep_ids)
+        })
+    elif keep is not None:
+        df = df[keep]
+
+    # Straight relabel from the module-level map; no per-call rename dict
+    return df.set_axis([LOCATION_ID_TO_NAME.get(c, c) for c in df.columns], axis=1)
+
+
+@st.fragment
+def render_data_table(filtered, numeric_cols):
+    """One page of the detailed table. A fragment, so paging reruns only this block."""
+    total = len(filtered)
+    pages = max((total - 1) // TABLE_PAGE_SIZE + 1, 1)
+
+    if pages > 1:
+        page = st.number_input(
+            "Page",
+            min_value=1,
+            max_value=pages,
+            value=1,
+            step=1,
+            help=f"Each page shows {TABLE_PAGE_SIZE:,} rows",
+        )
+        start = (page - 1) * TABLE_PAGE_SIZE
+        st.caption(
+            f"**{total:,}** records match (showing {start + 1:,}-{min(start + TABLE_PAGE_SIZE, total):,}, "
+            f"page {page} of {pages}). Sorted by most recent first. Download below for the full set."
+        )
+    else:
+        start = 0
+        st.caption(f"Showing all **{total:,}** records. Sorted by most recent first.")
+
+    # Only this page is serialized to Arrow and shipped to the browser
+    display_df = filtered.iloc[start:start + TABLE_PAGE_SIZE]
+    if "Time" in display_df.columns and not pd.api.types.is_string_dtype(display_df["Time"]):
+        display_df = display_df.assign(Time=display_df["Time"].astype(str))
+
+    # Formatting happens in the frontend: no display copy, and the payload stays numeric
+    column_config = {"Date": st.column_config.DateColumn("Date", format="YYYY-MM-DD")}
+    column_config.update(
+        {col: st.column_config.NumberColumn(col, format="%.2f") for col in numeric_cols}
+    )
+    st.dataframe(
+        display_df,
+        column_config=column_config,
+        use_container_width=True,
+        height=600,
+        hide_index=True,
+    )
+
+
+@st.fragment
+def render_yearly_tab():
+    """Yearly analysis as a fragment: its widgets rerun just this tab, not the dashboard's
+    health, stats, table and exports."""
+    try:
+        show_yearly_analysis_tab(get_client(), DEFAULT_VIEW)
+    except Exception as e:
+        st.error(f"⚠️ Yearly analysis error: {e}")
 
 
 def show_login_page():
@@ -452,17 +1037,7 @@ def show_login_page():
 def main():
     st.set_page_config(page_title="Noise Monitoring System", layout="wide", page_icon="🔊")
 
-    st.markdown("""
-        <style>
-        .main-header { font-size: 2.5rem; font-weight: 700; color: #1f77b4; margin-bottom: 0.5rem; }
-        .sub-header { font-size: 1.1rem; color: #666; margin-bottom: 2rem; }
-        .metric-card { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 1.5rem; border-radius: 10px; color: white; text-align: center; box-shadow: 0 4px 6px rgba(0,0,0,0.1); }
-        .latest-reading-card { padding: 1rem; border-radius: 8px; margin-bottom: 1rem; border-left: 5px solid; background-color: #f8f9fa; transition: transform 0.2s; }
-        .latest-reading-card:hover { transform: translateY(-2px); box-shadow: 0 4px 8px rgba(0,0,0,0.15); }
-        .section-divider { margin: 2rem 0; border-top: 2px solid #e9ecef; }
-        .info-badge { display: inline-block; padding: 0.25rem 0.75rem; border-radius: 12px; font-size: 0.85rem; font-weight: 600; margin-left: 0.5rem; }
-        </style>
-    """, unsafe_allow_html=True)
+    st.markdown(APP_CSS, unsafe_allow_html=True)
 
     # Check authentication
     if not st.session_state.get("auth", False):
@@ -578,11 +1153,15 @@ def main():
     st.sidebar.markdown("---")
     if st.sidebar.button("🔄 Clear Cache & Reload", use_container_width=True):
         st.cache_data.clear()
+        st.session_state.pop("prefetched_ranges", None)
         st.rerun()
 
     # Main content
-    st.markdown('<div class="main-header">🔊 Noise Monitoring System</div>', unsafe_allow_html=True)
-    st.markdown('<div class="sub-header">Real-time noise level monitoring across multiple locations in Singapore</div>', unsafe_allow_html=True)
+    st.markdown(
+        '<div class="main-header">🔊 Noise Monitoring System</div>'
+        '<div class="sub-header">Real-time noise level monitoring across multiple locations in Singapore</div>',
+        unsafe_allow_html=True,
+    )
 
     tab_dashboard, tab_yearly = st.tabs(["📊 Dashboard", "📅 Yearly Analysis"])
 
@@ -592,16 +1171,33 @@ def main():
             value_filter_active = (vmin is not None) or (vmax is not None)
     
             with st.spinner("Loading data..."):
-                if detect_persisted:
+                # Only the selected columns come back; value filters run in the query
+                if value_filter_active:
+                    # Long table first: only the in-range cells are shipped
+                    df_in_range = fetch_long_data(start_date, end_date, selected_ids, vmin=vmin, vmax=vmax)
+                    if df_in_range is None:
+                        df_in_range = fetch_all_data(start_date, end_date, columns=selected_ids, vmin=vmin, vmax=vmax)
+                    filtered = filter_frame(df_in_range, start_date, end_date, selected_ids, vmin, vmax, rows_prefiltered=True)
+
+                # Health and incident detection need every row, not just the in-range ones
+                if detect_persisted or not value_filter_active:
                     df_all = fetch_all_data(start_date, end_date, columns=selected_ids)
+                    # The date range was applied in the query; don't re-mask the whole frame here
+                    detection_frame = filter_frame(df_all, start_date, end_date, selected_ids, None, None, rows_prefiltered=True)
                 else:
-                    df_all = fetch_all_data(start_date, end_date)
-    
-                filtered = filter_frame(df_all, start_date, end_date, selected_ids, vmin, vmax)
-                detection_frame = filter_frame(df_all, start_date, end_date, selected_ids, None, None)
+                    detection_frame = filtered
+                if not value_filter_active:
+                    filtered = detection_frame
+                    prefetch_previous_range(start_date, end_date, selected_ids)
     
+            # 13 rows from the latest-readings view, not a scan of the minute frame
+            latest = fetch_latest_readings(selected_ids)
+            if latest is not None:
+                render_latest_readings(latest)
+
             if not filtered.empty:
-                location_cols = [c for c in detection_frame.columns if c not in ("Date", "Time")]
+                # Both frames went through filter_frame with the same ids: one column list serves every section
+                location_cols = [c for c in filtered.columns if c not in META_COLS]
                 incidents = []
     
                 if detect_persisted:
@@ -624,47 +1220,29 @@ def main():
                         filter_info.append(f"Max: {vmax} dB")
                     st.info(f"📊 Filter Range: **{' | '.join(filter_info)}**")
 
-                    location_cols = [c for c in filtered.columns if c not in ("Date", "Time")]
-                    location_counts = {}
-                    for loc in location_cols:
-                        if loc in filtered.columns:
-                            location_counts[loc] = filtered[loc].notna().sum()
-
-                    sorted_locations = sorted(location_counts.items(), key=lambda x: x[1], reverse=True)
-
-                    for i in range(0, len(sorted_locations), 3):
-                        cols = st.columns(3)
-                        for j, col_obj in enumerate(cols):
-                            if i + j < len(sorted_locations):
-                                loc, count = sorted_locations[i + j]
-                                if count == 0:
-                                    color = "#6c757d"; intensity = "None"
-                                elif count < 10:
-                                    color = "#28a745"; intensity = "Low"
-                                elif count < 50:
-                                    color = "#ffc107"; intensity = "Medium"
-                                elif count < 100:
-                                    color = "#fd7e14"; intensity = "High"
-                                else:
-                                    color = "#dc3545"; intensity = "Very High"
-
-                                with col_obj:
-                                    st.markdown(f"""
-                                        <div class="latest-reading-card" style="border-left-color: {color};">
-                                            <div style="font-size: 0.9rem; font-weight: 600; color: #333; margin-bottom: 0.5rem;">📍 {loc}</div>
-                                            <div style="font-size: 2.5rem; font-weight: bold; color: {color}; margin: 0.5rem 0;">
-                                                {count} <span style="font-size: 1.2rem;">times</span>
-                                            </div>
-                                            <div style="display: inline-block; padding: 0.25rem 0.75rem; border-radius: 12px;
-                                                 background-color: {color}; color: white; font-size: 0.85rem; font-weight: 600;">
-                                                {intensity} Frequency
-                                            </div>
-                                        </div>
-                                    """, unsafe_allow_html=True)
+                    location_counts = filtered[location_cols].count().sort_values(ascending=False, kind="stable")
+                    counts = location_counts.to_numpy()
+
+                    # One Arrow-serialized table instead of an HTML card per location
+                    st.dataframe(
+                        pd.DataFrame({
+                            "Location": location_counts.index,
+                            "Readings": counts,
+                            "Frequency": FREQUENCY_LEVELS[np.searchsorted(FREQUENCY_THRESHOLDS, counts, side="right")],
+                        }),
+                        column_config={
+                            "Location": st.column_config.TextColumn("📍 Location"),
+                            "Readings": st.column_config.ProgressColumn(
+                                "Readings in range", format="%d", min_value=0, max_value=max(int(counts.max(initial=0)), 1),
+                            ),
+                            "Frequency": st.column_config.TextColumn("Frequency"),
+                        },
+                        use_container_width=True,
+                        hide_index=True,
+                    )
 
                 else:
                     # === SENSOR HEALTH MONITORING SECTION ===
-                    location_cols = [c for c in filtered.columns if c not in ("Date", "Time")]
                     is_single_date = (start_date == end_date)
 
                     if is_single_date:
@@ -673,9 +1251,10 @@ def main():
 
                         health = get_sensor_health_single_date(detection_frame, start_date, location_cols)
 
-                        online_count = sum(1 for h in health.values() if h['status'] == 'ONLINE')
-                        degraded_count = sum(1 for h in health.values() if h['status'] == 'DEGRADED')
-                        offline_count = sum(1 for h in health.values() if h['status'] == 'OFFLINE')
+                        status_counts = Counter(h['status'] for h in health.values())
+                        online_count, degraded_count, offline_count = (
+                            status_counts['ONLINE'], status_counts['DEGRADED'], status_counts['OFFLINE']
+                        )
                         expected_timestamps = next(iter(health.values()))['expected'] if health else 0
                         system_health, _, _ = data_coverage_pct(detection_frame, expected_timestamps, location_cols)
 
@@ -683,50 +1262,25 @@ def main():
                         if health and degraded_count + offline_count == len(health) and system_health < 95:
                             st.warning("Most sensors share missing timestamps. Check the ETL and materialized-view timeline before treating this as a sensor outage.")
 
-                        status_order = {'OFFLINE': 0, 'DEGRADED': 1, 'ONLINE': 2}
-                        sorted_sensors = sorted(health.items(), key=lambda x: (status_order[x[1]['status']], x[0]))
-
-                        for i in range(0, len(sorted_sensors), 3):
-                            cols = st.columns(3)
-                            for j in range(3):
-                                if i + j < len(sorted_sensors):
-                                    loc, h = sorted_sensors[i + j]
-                                    colors = {
-                                        'ONLINE': {'bg': '#d4edda', 'border': '#28a745', 'text': '#155724'},
-                                        'DEGRADED': {'bg': '#fff3cd', 'border': '#ffc107', 'text': '#856404'},
-                                        'OFFLINE': {'bg': '#f8d7da', 'border': '#dc3545', 'text': '#721c24'}
-                                    }
-                                    color = colors[h['status']]
-                                    icons = {'ONLINE': '✅', 'DEGRADED': '⚠️', 'OFFLINE': '❌'}
-                                    messages = {'ONLINE': 'Fully operational', 'DEGRADED': 'Monitor closely', 'OFFLINE': 'Needs maintenance'}
-
-                                    with cols[j]:
-                                        st.markdown(f"""
-                                            <div style="background-color: {color['bg']}; border-left: 5px solid {color['border']};
-                                                 border-radius: 8px; padding: 1rem; margin-bottom: 0.5rem; height: 160px;
-                                                 display: flex; flex-direction: column; justify-content: space-between;">
-                                                <div style="font-size: 0.85rem; font-weight: 600; color: #333;">📍 {loc}</div>
-                                                <div style="font-size: 1.5rem; font-weight: bold; color: {color['text']};">
-                                                    {icons[h['status']]} {h['status']}
-                                                </div>
-                                                <div style="font-size: 1.1rem; font-weight: 600; color: #333;">
-                                                    {h['reading_count']:,}/{h['expected']:,}
-                                                </div>
-                                                <div style="font-size: 0.9rem; color: #666;">{h['completeness']:.1f}% complete</div>
-                                                <div style="font-size: 0.8rem; color: {color['text']};">{messages[h['status']]}</div>
-                                            </div>
-                                        """, unsafe_allow_html=True)
+                        sorted_sensors = sort_by_keys(list(health.items()), [(STATUS_ORDER[h['status']], loc) for loc, h in health.items()])
+
+                        render_card_grid([
+                            DAY_HEALTH_CARD.format_map({
+                                **h, 'status_class': h['status'].lower(), 'loc': loc,
+                                'icon': STATUS_ICONS[h['status']], 'message': STATUS_MESSAGES[h['status']],
+                            })
+                            for loc, h in sorted_sensors
+                        ])
 
                     else:
                         total_days = (end_date - start_date).days + 1
                         expected_timestamps = expected_minutes_for_range(start_date, end_date)
                         actual_timestamps = len(detection_frame[['Date', 'Time']].drop_duplicates())
 
-                        total_actual_readings = 0
-                        total_expected_readings = expected_timestamps * len(location_cols)
-                        for col in location_cols:
-                            if col in filtered.columns:
-                                total_actual_readings += detection_frame[col].notna().sum()
+                        # One count() pass gives both the caption totals and the coverage figure
+                        system_health, total_actual_readings, total_expected_readings = data_coverage_pct(
+                            detection_frame, expected_timestamps, location_cols
+                        )
 
                         if detect_persisted:
                             st.markdown("---")
@@ -739,15 +1293,7 @@ def main():
                                 num_locations = len(set(inc['location'] for inc in incidents))
                                 st.success(f"🔍 Found **{len(incidents)}** incidents across **{num_locations}** locations")
 
-                                incidents_df = pd.DataFrame(incidents)
-                                incidents_df['start_time_display'] = incidents_df['start_time'].dt.strftime('%b %d, %H:%M')
-                                incidents_df['end_time_display'] = incidents_df['end_time'].dt.strftime('%b %d, %H:%M')
-                                incidents_df['peak_db'] = incidents_df['peak_db'].round(1)
-                                incidents_df['avg_db'] = incidents_df['avg_db'].round(1)
-
-                                display_df = incidents_df[['location', 'start_time_display', 'end_time_display', 'duration', 'peak_db', 'avg_db']].copy()
-                                display_df.columns = ['Location', 'Start Time', 'End Time', 'Duration (min)', 'Peak dB', 'Avg dB']
-                                st.dataframe(display_df, use_container_width=True, hide_index=True)
+                                render_incidents_table(incidents)
                             else:
                                 st.info(f"✓ No persisted noise incidents detected for {persist_min_db}-{persist_max_db}dB lasting {persist_duration}+ minutes")
 
@@ -761,12 +1307,17 @@ def main():
                         )
                         st.caption("📊 Status based on data completeness: ✅ Online (≥70%) | ⚠️ Degraded (40-70%) | ❌ Offline (<40%)")
 
-                        health = get_sensor_health_date_range(detection_frame, start_date, end_date, location_cols)
+                        daily_counts = fetch_daily_counts(start_date, end_date, selected_ids)
+                        health = cached_sensor_health_date_range(
+                            start_date, end_date, tuple(location_cols),
+                            (frame_version(detection_frame), vmin, vmax),
+                            detection_frame, daily_counts,
+                        )
 
-                        online_count = sum(1 for h in health.values() if h['status'] == 'ONLINE')
-                        degraded_count = sum(1 for h in health.values() if h['status'] == 'DEGRADED')
-                        offline_count = sum(1 for h in health.values() if h['status'] == 'OFFLINE')
-                        system_health, _, _ = data_coverage_pct(detection_frame, expected_timestamps, location_cols)
+                        status_counts = Counter(h['status'] for h in health.values())
+                        online_count, degraded_count, offline_count = (
+                            status_counts['ONLINE'], status_counts['DEGRADED'], status_counts['OFFLINE']
+                        )
 
                         st.info(f"**Overall Data Coverage: {system_health:.0f}%** | ✅ {online_count} Operational | ⚠️ {degraded_count} Degraded | ❌ {offline_count} Critical")
                         if health and degraded_count + offline_count == len(health) and system_health < 95:
@@ -780,140 +1331,102 @@ def main():
                                     incidents_by_location[loc] = 0
                                 incidents_by_location[loc] += 1
 
-                        status_order = {'OFFLINE': 0, 'DEGRADED': 1, 'ONLINE': 2}
-                        sorted_sensors = sorted(health.items(), key=lambda x: (status_order[x[1]['status']], -len(x[1]['offline_dates'])))
-
-                        for i in range(0, len(sorted_sensors), 3):
-                            cols = st.columns(3)
-                            for j in range(3):
-                                if i + j < len(sorted_sensors):
-                                    loc, h = sorted_sensors[i + j]
-                                    colors = {
-                                        'ONLINE': {'bg': '#d4edda', 'border': '#28a745', 'text': '#155724'},
-                                        'DEGRADED': {'bg': '#fff3cd', 'border': '#ffc107', 'text': '#856404'},
-                                        'OFFLINE': {'bg': '#f8d7da', 'border': '#dc3545', 'text': '#721c24'}
-                                    }
-                                    color = colors[h['status']]
-                                    bg_color = color['bg']
-                                    border_color = color['border']
-                                    text_color = color['text']
-
-                                    icons = {'ONLINE': '✅', 'DEGRADED': '⚠️', 'OFFLINE': '❌'}
-                                    severities = {'ONLINE': 'Operational', 'DEGRADED': 'Monitor', 'OFFLINE': 'CRITICAL'}
-                                    icon = icons[h['status']]
-                                    severity = severities[h['status']]
-
-                                    if h['offline_dates']:
-                                        dates_str = ', '.join([d.strftime('%b %d') for d in h['offline_dates']])
-                                        issues_text = "Offline: " + dates_str
-                                    elif h['degraded_dates']:
-                                        dates_str = ', '.join([d.strftime('%b %d') for d in h['degraded_dates']])
-                                        issues_text = "Degraded: " + dates_str
-                                    else:
-                                        issues_text = "No days offline"
-
-                                    incident_count = incidents_by_location.get(loc, 0)
-
-                                    card_html = '<div style="background-color: ' + bg_color + '; border-left: 5px solid ' + border_color + '; border-radius: 8px; padding: 1rem; margin-bottom: 0.5rem; height: 220px; display: flex; flex-direction: column; justify-content: space-between;">'
-                                    card_html += '<div style="font-size: 0.85rem; font-weight: 600; color: #333;">📍 ' + loc + '</div>'
-                                    card_html += '<div style="font-size: 1.3rem; font-weight: bold; color: ' + text_color + ';">' + icon + ' ' + h['status'] + ' (' + str(int(h['completeness_pct'])) + '%)</div>'
-                                    card_html += '<div style="font-size: 0.9rem; color: #333;"><strong>Days online:</strong> ' + str(h['online_days']) + '/' + str(h['total_days']) + '</div>'
-                                    card_html += '<div style="font-size: 0.85rem; color: #666;"><strong>Readings:</strong> ' + "{:,}".format(h['total_readings']) + '/' + "{:,}".format(h['expected_readings']) + '</div>'
-                                    if detect_persisted and incident_count > 0:
-                                        card_html += '<div style="font-size: 0.85rem; color: #d63384; margin-top: 0.25rem;">⚠️ Persisted noise: ' + str(incident_count) + ' incidents</div>'
-                                    card_html += '<div style="font-size: 0.75rem; color: ' + text_color + '; margin-top: 0.25rem;">' + issues_text + '</div>'
-                                    card_html += '<div style="font-size: 0.8rem; font-weight: 600; color: ' + text_color + '; margin-top: 0.25rem;">' + severity + '</div>'
-                                    card_html += '</div>'
-
-                                    with cols[j]:
-                                        st.markdown(card_html, unsafe_allow_html=True)
-
-                st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
+                        sorted_sensors = sort_by_keys(
+                            list(health.items()),
+                            [(STATUS_ORDER[h['status']], -len(h['offline_dates'])) for h in health.values()],
+                        )
+
+                        cards = []
+                        for loc, h in sorted_sensors:
+                            if h['offline_dates_str']:
+                                issues_text = "Offline: " + h['offline_dates_str']
+                            elif h['degraded_dates_str']:
+                                issues_text = "Degraded: " + h['degraded_dates_str']
+                            else:
+                                issues_text = "No days offline"
+
+                            incident_count = incidents_by_location.get(loc, 0)
+                            incidents_html = (
+                                f'<div class="hc-incidents">⚠️ Persisted noise: {incident_count} incidents</div>'
+                                if detect_persisted and incident_count > 0 else ''
+                            )
+
+                            cards.append(RANGE_HEALTH_CARD.format_map({
+                                **h, 'status_class': h['status'].lower(), 'loc': loc,
+                                'icon': STATUS_ICONS[h['status']], 'severity': STATUS_SEVERITIES[h['status']],
+                                'completeness_int': int(h['completeness_pct']),
+                                'issues_text': issues_text, 'incidents_html': incidents_html,
+                            }))
+                        render_card_grid(cards)
 
                 # === SUMMARY STATISTICS ===
-                st.markdown("### 📊 Summary Statistics")
+                section_heading("📊 Summary Statistics")
                 st.caption("Overview of the current data selection")
 
                 col1, col2, col3, col4 = st.columns(4)
                 with col1:
                     st.metric(label="Total Records", value=f"{len(filtered):,}")
 
-                numeric_cols = [c for c in filtered.columns if c not in ("Date", "Time")]
-                if numeric_cols:
-                    all_values = []
-                    for col in numeric_cols:
-                        all_values.extend(filtered[col].dropna().tolist())
+                if location_cols:
+                    # One float32 block and C reductions, not a Python list of every reading
+                    vals = filtered[location_cols].to_numpy(dtype=np.float32, na_value=np.nan)
+                    # Drop the gaps once; the three reductions then run NaN-free over a dense array
+                    vals = vals[~np.isnan(vals)]
 
-                    if all_values:
-                        avg_val = sum(all_values) / len(all_values)
+                    if vals.size:
+                        avg_val = vals.sum(dtype=np.float64) / vals.size
                         with col2:
                             st.metric(label="Average Reading", value=f"{avg_val:.1f} dB")
                         with col3:
-                            st.metric(label="Min Reading", value=f"{min(all_values):.1f} dB")
+                            st.metric(label="Min Reading", value=f"{vals.min():.1f} dB")
                         with col4:
-                            st.metric(label="Max Reading", value=f"{max(all_values):.1f} dB")
-
-                st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
-
-                # === DATA TABLE — all rows, no pagination ===
-                st.markdown("### 📋 Detailed Data Table")
-                st.caption(f"Showing all **{len(filtered):,}** records. Sorted by most recent first. Scroll down to see more.")
-
-                display_df = filtered.copy()
-                if "Date" in display_df.columns:
-                    display_df["Date"] = pd.to_datetime(display_df["Date"]).dt.strftime("%Y-%m-%d")
-                if "Time" in display_df.columns:
-                    display_df["Time"] = display_df["Time"].astype(str)
-
-                numeric_cols = [c for c in display_df.columns if c not in ("Date", "Time")]
-
-                for col in numeric_cols:
-                    if col in display_df.columns:
-                        display_df[col] = display_df[col].round(2)
-                
-                st.dataframe(
-                    display_df,
-                    use_container_width=True,
-                    height=600,
-                    hide_index=True,
-                )
+                            st.metric(label="Max Reading", value=f"{vals.max():.1f} dB")
+
+                # === DATA TABLE — paged, TABLE_PAGE_SIZE rows at a time ===
+                section_heading("📋 Detailed Data Table")
+                render_data_table(filtered, location_cols)
 
                 # === EXPORT SECTION ===
-                st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
-                st.markdown("### 📥 Export Data")
+                section_heading("📥 Export Data")
                 st.caption("Download the current filtered dataset in your preferred format")
 
                 col_dl1, col_dl2 = st.columns(2)
+                # Everything filtered depends on, plus its data version so rows that arrive
+                # after the first export don't get served stale bytes; built on click and cached under it
+                export_signature = (
+                    str(start_date), str(end_date), tuple(selected_ids), vmin, vmax, frame_version(filtered),
+                )
 
                 with col_dl1:
-                    csv = filtered.to_csv(index=False)
                     timestamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
                     st.download_button(
                         label="📄 Download as CSV",
-                        data=csv,
+                        data=lambda: export_csv_bytes(export_signature, filtered),
                         file_name=f"noise_readings_{timestamp}.csv",
                         mime="text/csv",
+                        # Download only; no full-page rerun for a click
+                        on_click="ignore",
                         use_container_width=True,
                     )
 
                 with col_dl2:
-                    try:
-                        excel_buffer = io.BytesIO()
-                        filtered.to_excel(excel_buffer, index=False, engine="openpyxl")
-                        excel_buffer.seek(0)
+                    # The workbook is only built on click, so a failure can't be caught here;
+                    # rule out the one known one (sheet row limit) up front
+                    if len(filtered) < XLSX_MAX_ROWS:
                         st.download_button(
                             label="📊 Download as Excel",
-                            data=excel_buffer,
+                            data=lambda: export_xlsx_bytes(export_signature, filtered),
                             file_name=f"noise_readings_{timestamp}.xlsx",
                             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                            on_click="ignore",
                             use_container_width=True,
                         )
-                    except Exception:
-                        st.info("💡 Excel export temporarily unavailable. Please use CSV format.")
+                    else:
+                        st.info("💡 Too many rows for an Excel sheet. Please use CSV format.")
 
             else:
                 if detect_persisted and not detection_frame.empty:
-                    location_cols = [c for c in detection_frame.columns if c not in ("Date", "Time")]
+                    location_cols = [c for c in detection_frame.columns if c not in META_COLS]
                     render_persisted_noise_incidents(
                         detection_frame,
                         location_cols,
@@ -969,6 +1482,36 @@ def main():
                 CREATE INDEX idx_wide_view_date ON public.wide_view_mv ("Date");
 
                 REFRESH MATERIALIZED VIEW public.wide_view_mv;
+                ```
+
+                   Optionally add the per-day rollup the sensor health panel reads
+                   (refreshed by `refresh_mv.py` right after `wide_view_mv`):
+
+                ```sql
+                CREATE MATERIALIZED VIEW public.daily_counts_mv AS
+                SELECT
+                  "Date",
+                  COUNT("15490") as "15490", COUNT("16034") as "16034", COUNT("16041") as "16041",
+                  COUNT("14542") as "14542", COUNT("15725") as "15725", COUNT("16032") as "16032",
+                  COUNT("16045") as "16045", COUNT("15820") as "15820", COUNT("15821") as "15821",
+                  COUNT("15999") as "15999", COUNT("16026") as "16367", COUNT("16004") as "16004",
+                  COUNT("16005") as "16005"
+                FROM public.wide_view_mv
+                GROUP BY "Date";
+
+                CREATE UNIQUE INDEX idx_daily_counts_date ON public.daily_counts_mv ("Date");
+                ```
+
+                   And the view behind the Latest Readings cards:
+
+                ```sql
+                CREATE OR REPLACE VIEW public.latest_readings_v AS
+                SELECT DISTINCT ON (location_id)
+                  location_id,
+                  reading_value,
+                  (reading_datetime AT TIME ZONE 'Asia/Singapore') as reading_time
+                FROM public.meter_readings
+                ORDER BY location_id, reading_datetime DESC;
                 ```
 
                 2. **Set environment variables** or Streamlit secrets:
@@ -982,10 +1525,7 @@ def main():
 
             st.error(f"**Technical Error:** {str(e)}")
     with tab_yearly:
-            try:
-                show_yearly_analysis_tab(get_client(), DEFAULT_VIEW)
-            except Exception as e:
-                st.error(f"⚠️ Yearly analysis error: {e}")
+        render_yearly_tab()
 
 
 if __name__ == "__main__":
@@ -6,22 +6,30 @@ Beginner overview:
 - This script starts from yesterday (SGT) and goes one day back at a time.
 - For each day, it fetches per-minute readings for every device and writes them
   to Supabase with upsert (so reruns are safe).
+- Fetching and upserting overlap: while one day is being upserted, the next
+  FETCH_DAYS_AHEAD days (default 3) are already being fetched in the background
+  by fetch_days, so a day costs roughly max(fetch, upsert) rather than the sum.
 - It stops when it finds several consecutive empty days (configurable) or when
   it hits a maximum “years back” horizon.
 
 Config via environment variables (with defaults):
 - EMPTY_CHUNKS_TO_STOP: how many empty days in a row before stopping (default 2)
 - BACKFILL_MAX_YEARS: how far back to go at most (default 5)
+- BACKFILL_FORCE: set to 1 to refetch days that already have a full set of rows
+  (and to ignore a saved resume cursor)
+- BACKFILL_STATE_FILE: where the resume cursor is kept (default .backfill_cursor in
+  the working directory). Point it at storage that outlives the run (a mounted
+  volume, a cached path); on an ephemeral runner such as GitHub Actions the file
+  is discarded with the job, so there is nothing to resume from
 - SUPABASE_URL, SUPABASE_ANON_KEY, API_BASE_URL, SUPABASE_TABLE (like daily script)
 """
 
 import os
-import time
+import json
 import logging
 from datetime import datetime, timedelta, date
 from dotenv import load_dotenv
-from supabase import create_client
-from supabase_common import API_DEFAULT, LOCATIONS, build_rows, upsert_rows, yesterday_sgt, SGT
+from supabase_common import API_DEFAULT, LOCATIONS, fetch_days, upsert_rows, yesterday_sgt, SGT, get_supabase
 
 logging.basicConfig(
     level=logging.INFO, 
@@ -29,8 +37,49 @@ logging.basicConfig(
 )
 log = logging.getLogger("supabase-backfill-all")
 
+# A complete SGT day: one reading per minute for every location
+FULL_DAY_ROWS = 1440 * len(LOCATIONS)
 
 
+def day_row_count(supabase, table: str, day: date) -> int:
+    """Rows already stored for one SGT calendar day (-1 if the count query fails)."""
+    start = datetime(day.year, day.month, day.day, tzinfo=SGT)
+    try:
+        resp = (
+            supabase.table(table)
+            .select("reading_datetime", count="exact")
+            .gte("reading_datetime", start.isoformat())
+            .lt("reading_datetime", (start + timedelta(days=1)).isoformat())
+            .limit(1)
+            .execute()
+        )
+        return resp.count or 0
+    except Exception as e:
+        log.warning(f"  ⚠️  Row count for {day} failed ({e}); fetching it anyway")
+        return -1
+
+
+def load_cursor(path: str):
+    """Return the saved resume state, or None if there is none (or it's unreadable)."""
+    try:
+        with open(path) as f:
+            state = json.load(f)
+        return date.fromisoformat(state["cursor"]), int(state.get("empty_streak", 0))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        log.warning(f"Ignoring unreadable cursor file {path}: {e}")
+        return None
+
+
+def save_cursor(path: str, cursor: date, empty_streak: int) -> None:
+    """Record the oldest finished day; written to a temp file then renamed, so a
+    crash mid-write never leaves a half-written cursor behind."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"cursor": cursor.isoformat(), "empty_streak": empty_streak}, f)
+    os.replace(tmp, path)
+
 
 def main():
     load_dotenv()
@@ -42,19 +91,26 @@ def main():
     
     # Supabase client
     try:
-        supabase_url = os.environ["SUPABASE_URL"]
-        supabase_key = os.getenv("SUPABASE_SERVICE_KEY") or os.environ["SUPABASE_ANON_KEY"]
+        supabase = get_supabase()
     except KeyError as e:
         log.error(f"Missing environment variable: {e}")
         log.error("Please set SUPABASE_URL and SUPABASE_ANON_KEY in your .env file")
         return
     
-    supabase = create_client(supabase_url, supabase_key)
-    
     # Date range: from yesterday back to May 1, 2025
     end_date = yesterday_sgt()
     start_date_str = os.getenv("BACKFILL_START_DATE", "2025-05-01")
     start_date = date.fromisoformat(start_date_str)
+    force = os.getenv("BACKFILL_FORCE", "0") == "1"
+    
+    # Resume below the last day an interrupted run finished
+    state_file = os.getenv("BACKFILL_STATE_FILE", ".backfill_cursor")
+    saved = None if force else load_cursor(state_file)
+    empty_streak = 0
+    if saved:
+        cursor, empty_streak = saved
+        end_date = min(cursor - timedelta(days=1), end_date)
+        log.info(f"Resuming from cursor {cursor} in {state_file}")
     
     log.info("=" * 70)
     log.info("BACKFILL STARTING")
@@ -65,43 +121,60 @@ def main():
     log.info(f"Empty day threshold: {empty_chunks_to_stop} consecutive days")
     log.info("=" * 70)
     
-    empty_streak = 0
     total_affected = 0
     days_processed = 0
     days_with_data = 0
+    days_skipped = 0
     
-    current_date = end_date
+    def days_to_fetch():
+        """Newest day first, minus days whose rows are all in Supabase already.
+
+        Runs lazily inside fetch_days, so a complete day costs one count query
+        instead of 13 API calls and an upsert.
+        """
+        nonlocal days_skipped
+        for i in range((end_date - start_date).days + 1):
+            day = end_date - timedelta(days=i)
+            if not force and day_row_count(supabase, table, day) >= FULL_DAY_ROWS:
+                days_skipped += 1
+                log.info(f"  ⏭  {day} already complete ({FULL_DAY_ROWS:,} rows), skipping")
+                continue
+            yield day
+    
+    # The next few days are already being fetched while one is upserted
+    oldest_done = end_date + timedelta(days=1)
+    # Once a day fails, the cursor stays put so a rerun retries it
+    cursor_held = False
     
-    while current_date >= start_date:
+    for current_date, day_results in fetch_days(api_base, days_to_fetch()):
         days_processed += 1
         day_rows = []
         
         log.info(f"\n[Day {days_processed}] Processing {current_date.strftime('%Y-%m-%d (%A)')}")
         
-        # Fetch data for all locations for this day
-        for loc in LOCATIONS:
-            try:
-                loc_rows = build_rows(api_base, loc, current_date)
-                day_rows.extend(loc_rows)
-                
-                if loc_rows:
-                    log.info(f"  ✓ {loc['Name'][:30]:30s} - {len(loc_rows):4d} readings")
-                else:
-                    log.debug(f"  - {loc['Name'][:30]:30s} - no data")
-                
-                # Small delay to avoid overwhelming the API
-                time.sleep(0.05)
-                
-            except Exception as e:
-                log.error(f"  ✗ {loc['Name'][:30]:30s} - Error: {e}")
+        failed = 0
+        
+        # All locations for this day (fetched concurrently, FETCH_CONCURRENCY at a time)
+        for loc, loc_rows in day_results:
+            if loc_rows is None:
+                failed += 1  # fetch failed even after retries; build_rows logged it
                 continue
+            day_rows.extend(loc_rows)
+            
+            if loc_rows:
+                log.info(f"  ✓ {loc['NamePad']} - {len(loc_rows):4d} readings")
+            else:
+                log.debug(f"  - {loc['NamePad']} - no data")
         
         # Upsert the day's data
         try:
             affected = upsert_rows(supabase, table, day_rows)
             total_affected += affected
             
-            if affected == 0:
+            if affected == 0 and failed:
+                # An unreachable API is not evidence that the data has run out
+                log.warning(f"  ⚠️  NO DATA - {failed} location fetch(es) failed, not counted as empty")
+            elif affected == 0:
                 empty_streak += 1
                 log.warning(f"  ⚠️  NO DATA - Empty streak: {empty_streak}/{empty_chunks_to_stop}")
             else:
@@ -116,9 +189,13 @@ def main():
                 
         except Exception as e:
             log.error(f"  ✗ Database error: {e}")
+            cursor_held = True
         
-        # Move to previous day
-        current_date = current_date - timedelta(days=1)
+        # This day is done; the loop moves on to the previous one
+        oldest_done = current_date
+        cursor_held = cursor_held or failed > 0
+        if not cursor_held:
+            save_cursor(state_file, oldest_done, empty_streak)
         
         # Progress update every 10 days
         if days_processed % 10 == 0:
@@ -128,14 +205,19 @@ def main():
             log.info(f"   Total rows: {total_affected:,}")
             log.info(f"   Success rate: {days_with_data/days_processed*100:.1f}%")
     
+    # Finished cleanly: the next run starts from yesterday again
+    if not cursor_held and os.path.exists(state_file):
+        os.remove(state_file)
+    
     # Final summary
     log.info("\n" + "=" * 70)
     log.info("✅ BACKFILL COMPLETE")
     log.info("=" * 70)
     log.info(f"Total days processed: {days_processed}")
-    log.info(f"Days with data: {days_with_data} ({days_with_data/days_processed*100:.1f}%)")
+    log.info(f"Days skipped (already complete): {days_skipped}")
+    log.info(f"Days with data: {days_with_data} ({days_with_data/max(days_processed,1)*100:.1f}%)")
     log.info(f"Total rows upserted: {total_affected:,}")
-    log.info(f"Date range covered: {current_date + timedelta(days=1)} to {end_date}")
+    log.info(f"Date range covered: {oldest_done} to {end_date}")
     log.info(f"Average rows per day: {total_affected/max(days_with_data,1):,.0f}")
     log.info("=" * 70)
 
@@ -14,13 +14,11 @@ Why this exists vs supabase_backfill_all.py:
 
 import os
 import sys
-import time
 import logging
 import argparse
 from datetime import datetime, timedelta, date
 from dotenv import load_dotenv
-from supabase import create_client
-from supabase_common import API_DEFAULT, LOCATIONS, build_rows, upsert_rows, SGT, yesterday_sgt
+from supabase_common import API_DEFAULT, LOCATIONS, fetch_days, upsert_rows, SGT, yesterday_sgt, get_supabase
 
 logging.basicConfig(
     level=logging.INFO,
@@ -84,21 +82,19 @@ def run_gap_backfill(api_base: str, supabase, table: str,
     total_affected = 0
     total_dates    = len(dates_to_fill)
 
-    for i, day in enumerate(dates_to_fill, 1):
+    # Later dates are fetched in the background while each one is logged and upserted
+    for i, (day, day_results) in enumerate(fetch_days(api_base, dates_to_fill), 1):
         log.info(f"\n[{i}/{total_dates}] Backfilling {day.strftime('%Y-%m-%d (%A)')}")
         day_rows = []
 
-        for loc in LOCATIONS:
-            try:
-                loc_rows = build_rows(api_base, loc, day)
-                day_rows.extend(loc_rows)
-                if loc_rows:
-                    log.info(f"  ✓ {loc['Name'][:30]:30s} — {len(loc_rows):4d} readings")
-                else:
-                    log.warning(f"  ⚠ {loc['Name'][:30]:30s} — no data returned")
-                time.sleep(0.05)
-            except Exception as e:
-                log.error(f"  ✗ {loc['Name'][:30]:30s} — Error: {e}")
+        for loc, loc_rows in day_results:
+            if loc_rows is None:
+                continue  # fetch failed even after retries; build_rows logged it
+            day_rows.extend(loc_rows)
+            if loc_rows:
+                log.info(f"  ✓ {loc['NamePad']} — {len(loc_rows):4d} readings")
+            else:
+                log.warning(f"  ⚠ {loc['NamePad']} — no data returned")
 
         try:
             affected = upsert_rows(supabase, table, day_rows)
@@ -124,13 +120,11 @@ def main():
     table    = os.getenv("SUPABASE_TABLE", "meter_readings")
 
     try:
-        supabase_url = os.environ["SUPABASE_URL"]
-        supabase_key = os.getenv("SUPABASE_SERVICE_KEY") or os.environ["SUPABASE_ANON_KEY"]
+        supabase = get_supabase()
     except KeyError as e:
         log.error(f"Missing environment variable: {e}")
         sys.exit(1)
 
-    supabase  = create_client(supabase_url, supabase_key)
     yesterday = yesterday_sgt()
 
     # Determine date range
@@ -4,13 +4,11 @@ Hourly Supabase ETL - fetches TODAY (SGT) for all locations.
 Runs every hour via GitHub Actions to keep dashboard current.
 """
 import os
-import time
 import logging
 from datetime import datetime
 from dotenv import load_dotenv
-from supabase import create_client
-from typing import List, Dict
-from supabase_common import API_DEFAULT, LOCATIONS, build_rows, upsert_rows, SGT
+from typing import List
+from supabase_common import API_DEFAULT, LOCATIONS, fetch_day, upsert_rows, SGT, get_supabase, Row
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 log = logging.getLogger("supabase-today")
@@ -22,13 +20,11 @@ def main():
     table = os.getenv("SUPABASE_TABLE", "meter_readings")
 
     try:
-        supabase_url = os.environ["SUPABASE_URL"]
-        supabase_key = os.getenv("SUPABASE_SERVICE_KEY") or os.environ["SUPABASE_ANON_KEY"]
+        supabase = get_supabase()
     except KeyError as e:
         log.error(f"Missing environment variable: {e}")
         return
 
-    supabase = create_client(supabase_url, supabase_key)
     now_sgt = datetime.now(SGT)
     today = now_sgt.date()
     
@@ -40,24 +36,18 @@ def main():
     log.info(f"Locations: {len(LOCATIONS)}")
     log.info("=" * 70)
 
-    day_rows: List[Dict[str, object]] = []
+    day_rows: List[Row] = []
 
-    # Per-location fetch with error handling — same as backfill
-    for loc in LOCATIONS:
-        try:
-            loc_rows = build_rows(api_base, loc, today)
-            day_rows.extend(loc_rows)
+    # Concurrent per-location fetch — same as backfill; a failed location yields None
+    for loc, loc_rows in fetch_day(api_base, today):
+        if loc_rows is None:
+            continue  # fetch failed even after retries; build_rows logged it
+        day_rows.extend(loc_rows)
 
-            if loc_rows:
-                log.info(f"  ✓ {loc['Name'][:30]:30s} - {len(loc_rows):4d} readings")
-            else:
-                log.warning(f"  ⚠ {loc['Name'][:30]:30s} - no data returned")
-
-            time.sleep(0.05)
-
-        except Exception as e:
-            log.error(f"  ✗ {loc['Name'][:30]:30s} - Error: {e}")
-            continue  # skip this location, keep going
+        if loc_rows:
+            log.info(f"  ✓ {loc['NamePad']} - {len(loc_rows):4d} readings")
+        else:
+            log.warning(f"  ⚠ {loc['NamePad']} - no data returned")
 
     # Upsert all collected rows
     try:
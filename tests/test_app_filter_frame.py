@@ -0,0 +1,22 @@
+from datetime import date
+
+import app
+
+IDS = ("15490", "16034")
+ROWS = [
+    {"Date": "2025-05-01", "Time": "00:00", "15490": 65.0, "16034": 70.1},
+    {"Date": "2025-05-01", "Time": "00:01", "15490": 60.0, "16034": None},
+]
+
+
+def test_value_filter_matching_nothing_returns_empty_frame():
+    out = app.filter_frame(app._to_frame(ROWS, IDS), date(2025, 5, 1), list(IDS), 99, None)
+    assert out.empty
+
+
+def test_reading_exactly_at_bound_is_kept():
+    # 70.1 is stored as float32 70.0999985; the database's gte/lte already matched it
+    frame = app._to_frame(ROWS, IDS)
+    for vmin, vmax in ((70.1, None), (None, 70.1)):
+        out = app.filter_frame(frame, date(2025, 5, 1), ["16034"], vmin, vmax)
+        assert "00:00" in set(out["Time"])
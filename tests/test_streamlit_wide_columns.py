@@ -0,0 +1,9 @@
+import streamlit_app
+
+
+def test_tengah_is_read_from_the_wide_view_16026_column():
+    ids = ("15490", "16367")
+    assert streamlit_app.wide_select(ids) == "Date,Time,15490,16367:16026"
+    assert streamlit_app.value_range_filter(ids, 70, 80) == (
+        "and(15490.gte.70,15490.lte.80),and(16026.gte.70,16026.lte.80)"
+    )
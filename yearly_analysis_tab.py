@@ -10,6 +10,7 @@ The yearly view is built around three questions:
 """
 
 import calendar
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
 
 import altair as alt
@@ -17,6 +18,8 @@ import pandas as pd
 import streamlit as st
 
 READINGS_PER_DAY = 1440
+FETCH_BATCH = 1000
+FETCH_WORKERS = 8
 
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
@@ -92,8 +95,8 @@ def _ranked_bar(
     height_step: int = 34,
 ) -> None:
     """Readable horizontal bar chart for location ranking."""
-    chart_df = data[["location", value_col]].copy().sort_values(value_col, ascending=True)
-    chart_df[value_col] = pd.to_numeric(chart_df[value_col], errors="coerce").fillna(0)
+    chart_df = data[["location", value_col]].sort_values(value_col, ascending=True)
+    chart_df = chart_df.assign(**{value_col: pd.to_numeric(chart_df[value_col], errors="coerce").fillna(0)})
     height = max(260, len(chart_df) * height_step)
 
     bars = (
@@ -122,10 +125,10 @@ def _ranked_bar(
 
 
 def _month_bar(data: pd.DataFrame, value_col: str, title: str, value_title: str) -> None:
-    chart_df = data[["month_label", value_col]].copy()
-    chart_df[value_col] = pd.to_numeric(chart_df[value_col], errors="coerce").fillna(0)
-    chart_df["month_label"] = pd.Categorical(chart_df["month_label"], categories=_month_order(), ordered=True)
-    chart_df = chart_df.sort_values("month_label")
+    chart_df = data[["month_label", value_col]].assign(**{
+        value_col: pd.to_numeric(data[value_col], errors="coerce").fillna(0),
+        "month_label": pd.Categorical(data["month_label"], categories=_month_order(), ordered=True),
+    }).sort_values("month_label")
 
     chart = (
         alt.Chart(chart_df)
@@ -145,10 +148,11 @@ def _month_bar(data: pd.DataFrame, value_col: str, title: str, value_title: str)
 
 
 def _format_summary_table(df: pd.DataFrame) -> pd.DataFrame:
-    display = df.copy()
-    display["Avg Event Length"] = display["avg_duration_per_incident"].apply(_human_duration)
-    display["Avg Monthly Load"] = display["avg_monthly_persisted_minutes"].apply(_human_duration)
-    display["Total Load"] = display["total_duration_minutes"].apply(_human_duration)
+    display = df.assign(**{
+        "Avg Event Length": df["avg_duration_per_incident"].apply(_human_duration),
+        "Avg Monthly Load": df["avg_monthly_persisted_minutes"].apply(_human_duration),
+        "Total Load": df["total_duration_minutes"].apply(_human_duration),
+    })
     return display[[
         "location", "total_incidents", "Avg Event Length", "avg_duration_per_incident",
         "Avg Monthly Load", "avg_monthly_persisted_minutes", "avg_peak_db", "max_peak_db",
@@ -172,24 +176,26 @@ def _fetch_monthly_chunk(client, view_name: str, location_id: str,
     start = date(year, month, 1)
     end = date(year, month, last_day)
 
-    all_data, offset, batch_size = [], 0, 1000
-    while True:
-        resp = (
+    def fetch(offset: int, count=None):
+        return (
             client.table(view_name)
-            .select(f"Date,Time,{location_id}")
+            .select(f"Date,Time,{location_id}", count=count)
             .gte("Date", str(start))
             .lte("Date", str(end))
             .order("Date").order("Time")
-            .range(offset, offset + batch_size - 1)
+            .range(offset, offset + FETCH_BATCH - 1)
             .execute()
         )
-        batch = resp.data or []
-        if not batch:
-            break
-        all_data.extend(batch)
-        if len(batch) < batch_size:
-            break
-        offset += batch_size
+
+    # The first slice carries the exact total, so the rest is known up front
+    # instead of probing for a short (or empty) page one request at a time
+    first = fetch(0, count="exact")
+    all_data = list(first.data or [])
+    offsets = range(FETCH_BATCH, first.count or 0, FETCH_BATCH)
+    if offsets:
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+            for resp in pool.map(fetch, offsets):
+                all_data.extend(resp.data or [])
 
     return pd.DataFrame(all_data)
 
@@ -201,18 +207,16 @@ def _detect_incidents(df: pd.DataFrame, location_id: str,
     if df.empty or location_id not in df.columns:
         return []
 
-    df = df.copy()
-    df[location_id] = pd.to_numeric(df[location_id], errors="coerce")
-
-    vals = df[location_id]
+    # Only the reading column is needed: no copy of the month's Date/Time columns
+    vals = pd.to_numeric(df[location_id], errors="coerce")
     in_range = vals.between(min_db, max_db, inclusive="both").fillna(False)
     group = (in_range != in_range.shift()).cumsum().where(in_range)
 
     incidents = []
-    for _gid, chunk in df.groupby(group):
+    for _gid, chunk in vals.groupby(group):
         if len(chunk) < duration_minutes:
             continue
-        v = chunk[location_id].dropna()
+        v = chunk.dropna()
         if v.empty:
             continue
         incidents.append({
@@ -336,7 +340,8 @@ def _render_single_location(loc_id: str, df: pd.DataFrame) -> None:
     loc_name = LOCATION_PRESETS[loc_id]["name"]
     preset = LOCATION_PRESETS[loc_id]
 
-    loc_df = df[df["location_id"] == loc_id].copy() if "location_id" in df.columns else df.copy()
+    # _ordered_df works on its own copy, so the selection needs none
+    loc_df = df[df["location_id"] == loc_id] if "location_id" in df.columns else df
     if loc_df.empty:
         st.info(f"No data found for **{loc_name}**.")
         return
@@ -380,13 +385,10 @@ def _render_single_location(loc_id: str, df: pd.DataFrame) -> None:
         _month_bar(loc_df, "avg_peak_db", "Average Peak dB by Month", "dB")
 
     st.markdown("**Monthly Breakdown**")
-    display = loc_df[[
-        "month_label", "incident_count", "avg_duration_per_incident",
-        "total_duration_minutes", "avg_peak_db", "max_peak_db"
-    ]].copy()
-    display["Avg Event Length"] = display["avg_duration_per_incident"].apply(_human_duration)
-    display["Total Noise Load"] = display["total_duration_minutes"].apply(_human_duration)
-    display = display[[
+    display = loc_df.assign(**{
+        "Avg Event Length": loc_df["avg_duration_per_incident"].apply(_human_duration),
+        "Total Noise Load": loc_df["total_duration_minutes"].apply(_human_duration),
+    })[[
         "month_label", "incident_count", "Avg Event Length", "avg_duration_per_incident",
         "Total Noise Load", "total_duration_minutes", "avg_peak_db", "max_peak_db"
     ]]
@@ -404,37 +406,31 @@ def _safe_weighted_peak(df: pd.DataFrame) -> float:
     return round((df["avg_peak_db"] * df["incident_count"]).sum() / total_incidents, 1)
 
 
+def _per(numerator: pd.Series, denominator: pd.Series) -> pd.Series:
+    """Column-wise numerator / denominator to 0.1, and 0.0 where the denominator is 0."""
+    return (numerator / denominator.where(denominator > 0)).round(1).fillna(0.0)
+
+
 def _location_summary(df: pd.DataFrame) -> pd.DataFrame:
     df = _ensure_summary_metrics(df)
     df["weighted_peak_sum"] = df["avg_peak_db"] * df["incident_count"]
+    df["had_incidents"] = df["incident_count"] > 0
     summary = (
         df.groupby("location", as_index=False)
         .agg(
             total_incidents=("incident_count", "sum"),
             total_duration_minutes=("total_duration_minutes", "sum"),
-            months_with_incidents=("incident_count", lambda s: int((s > 0).sum())),
+            months_with_incidents=("had_incidents", "sum"),
             weighted_peak_sum=("weighted_peak_sum", "sum"),
             max_peak_db=("max_peak_db", "max"),
         )
     )
-    summary["avg_duration_per_incident"] = summary.apply(
-        lambda r: round(r["total_duration_minutes"] / r["total_incidents"], 1)
-        if r["total_incidents"] > 0 else 0.0,
-        axis=1,
-    )
+    summary["avg_duration_per_incident"] = _per(summary["total_duration_minutes"], summary["total_incidents"])
     summary["avg_monthly_persisted_minutes"] = (
         summary["total_duration_minutes"] / len(_months_to_process())
     ).round(1)
-    summary["avg_active_month_minutes"] = summary.apply(
-        lambda r: round(r["total_duration_minutes"] / r["months_with_incidents"], 1)
-        if r["months_with_incidents"] > 0 else 0.0,
-        axis=1,
-    )
-    summary["avg_peak_db"] = summary.apply(
-        lambda r: round(r["weighted_peak_sum"] / r["total_incidents"], 1)
-        if r["total_incidents"] > 0 else 0.0,
-        axis=1,
-    )
+    summary["avg_active_month_minutes"] = _per(summary["total_duration_minutes"], summary["months_with_incidents"])
+    summary["avg_peak_db"] = _per(summary["weighted_peak_sum"], summary["total_incidents"])
     return summary.sort_values("total_incidents", ascending=False)
 
 
@@ -611,27 +607,24 @@ def show_yearly_analysis_tab(supabase_client, view_name: str) -> None:
 
     preset_overrides: dict[str, dict] = {}
 
-    for i in range(0, len(selected_locs), 2):
-        cols = st.columns(2)
-        for j in range(2):
-            if i + j >= len(selected_locs):
-                break
-            loc_id = selected_locs[i + j]
-            default = LOCATION_PRESETS[loc_id]
-
-            with cols[j]:
-                with st.expander(default["name"], expanded=False):
-                    st.caption(default.get("notes", ""))
-                    min_db = st.number_input("Min dB", value=float(default["min_db"]),
-                                              min_value=0.0, max_value=200.0, step=1.0,
-                                              key=f"yr_min_{loc_id}")
-                    max_db = st.number_input("Max dB", value=float(default["max_db"]),
-                                              min_value=0.0, max_value=200.0, step=1.0,
-                                              key=f"yr_max_{loc_id}")
-                    dur = st.number_input("Min Duration (min)", value=int(default["duration_minutes"]),
-                                          min_value=1, max_value=60, step=1,
-                                          key=f"yr_dur_{loc_id}")
-                    preset_overrides[loc_id] = {"min_db": min_db, "max_db": max_db, "duration_minutes": dur}
+    # One pair of columns for all expanders (alternating), not a new st.columns row per pair
+    cols = st.columns(2)
+    for i, loc_id in enumerate(selected_locs):
+        default = LOCATION_PRESETS[loc_id]
+
+        with cols[i % 2]:
+            with st.expander(default["name"], expanded=False):
+                st.caption(default.get("notes", ""))
+                min_db = st.number_input("Min dB", value=float(default["min_db"]),
+                                          min_value=0.0, max_value=200.0, step=1.0,
+                                          key=f"yr_min_{loc_id}")
+                max_db = st.number_input("Max dB", value=float(default["max_db"]),
+                                          min_value=0.0, max_value=200.0, step=1.0,
+                                          key=f"yr_max_{loc_id}")
+                dur = st.number_input("Min Duration (min)", value=int(default["duration_minutes"]),
+                                      min_value=1, max_value=60, step=1,
+                                      key=f"yr_dur_{loc_id}")
+                preset_overrides[loc_id] = {"min_db": min_db, "max_db": max_db, "duration_minutes": dur}
 
     for loc_id in selected_locs:
         if loc_id not in preset_overrides: